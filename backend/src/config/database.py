@@ -1,23 +1,77 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import event, inspect, text, Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Route the configured URL through the asyncio drivers
+ASYNC_DATABASE_URL = (
+    DATABASE_URL
+    .replace("sqlite://", "sqlite+aiosqlite://", 1)
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite serialises writers itself, so a large pool buys nothing; an in-memory
+    # database must share its single connection or every checkout sees an empty schema
+    engine_kwargs = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" in DATABASE_URL:
+        engine_kwargs["poolclass"] = StaticPool
+else:
+    engine_kwargs = {
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "insertmanyvalues_page_size": 1000
+    }
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_kwargs)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        # WAL lets readers proceed while an upload holds the write lock
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def _check_schema(sync_conn):
+    # create_all never alters an existing table, so a database from before the chunk_pk
+    # surrogate key would otherwise start up and fail on the first upload or query
+    inspector = inspect(sync_conn)
+    for table in ("chunks", "questions_logs"):
+        if inspector.has_table(table) and "chunk_pk" not in {column["name"] for column in inspector.get_columns(table)}:
+            raise RuntimeError(
+                f"Table {table!r} predates the chunk_pk key; export the documents, drop the chunks, "
+                "questions_logs and documents tables (or the database) and re-upload to re-index"
+            )
+    if sync_conn.dialect.name == "sqlite" and inspector.has_table("chunks"):
+        ddl = sync_conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'chunks'")).scalar()
+        if "AUTOINCREMENT" not in ddl.upper():
+            # Without it SQLite reuses a deleted chunk_pk, which the vector store still holds as a tombstone
+            raise RuntimeError(
+                "Table 'chunks' was created without AUTOINCREMENT; drop the chunks, questions_logs and "
+                "documents tables (or the database) and re-upload to re-index"
+            )
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(_check_schema)
+        await conn.run_sync(Base.metadata.create_all)
 
 # Explicitly export the classes and functions to make them importable from app.database
 __all__ = ["User", "Document", "Chunk", "QuestionsLogs", "get_db", "init_db"]
@@ -1,5 +1,6 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -13,20 +14,40 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: list = [".pdf", ".txt", ".docx"]
 
-    ALLOWED_FILE_TYPES = ['.pdf']
-    DEFAULT_PAGE_SIZE = 20
-    MAX_PAGE_SIZE = 100
+    ALLOWED_FILE_TYPES: List[str] = ['.pdf']
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
     
     VECTOR_DB_DIR: str = "vector_db/indices"
+    VECTOR_INDEX_TYPE: str = "hnsw_sq8"  # or "hnsw", "hnsw_fp16", "ivf", "ivfpq", "pq", "sq8"
+    VECTOR_TRAIN_SIZE: int = 4096
+    VECTOR_IVF_NPROBE: int = 8
+    VECTOR_PQ_M: int = 48
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_HNSW_EF_SEARCH: int = 40
+    VECTOR_CHECKPOINT_EVERY: int = 50  # uploads between full index snapshots
+    VECTOR_COMPACT_RATIO: float = 0.2  # deleted fraction of the index that triggers a compaction
+    FAISS_THREADS: int = 8
+    EMBED_BATCH_SIZE: int = 128
+    EMBED_BATCH_WAIT_MS: int = 50
+    EMBED_WORKERS: int = 0  # CPU encoder processes; 0 or 1 keeps encoding in-process
+    EMBED_MULTI_PROCESS_MIN: int = 64  # smaller batches stay in-process, below this the IPC costs more than it saves
     EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
     SIMILARITY_THRESHOLD: float = 0.5
+    SEMANTIC_CACHE_THRESHOLD: float = 0.86
+    SEMANTIC_CACHE_SIZE: int = 1024
+    QUERY_EMBED_CACHE_SIZE: int = 10000
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     
    
     ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
-    class Config:
-        env_file = ".env"
+    model_config = SettingsConfigDict(env_file=".env")
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # One .env parse and validation per process, however many modules ask
+    return Settings()
+
+settings = get_settings()
\ No newline at end of file
@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import tuple_ 
+from sqlalchemy import insert, select, func
 from datetime import timedelta
+from itertools import islice
 from typing import List, Optional
+import faiss
 import os
 import logging
 from dotenv import load_dotenv
@@ -13,7 +17,7 @@ from dotenv import load_dotenv
 from src.config.database import init_db, get_db, User, Document, Chunk, QuestionsLogs
 from src.schema.models.users_model  import UserCreate, UserLogin, Token
 from src.schema.models.question_logs_model import QueryRequest, QueryResponse, QueryCreate, QueryHistory, QueryHistoryResponse
-from src.schema.models.documents_model import DocumentUpload, DocumentResponse
+from src.schema.models.documents_model import DocumentUpload, DocumentResponse, DocumentListResponse
 from src.schema.models.chunks_model import DocumentChunk, DocumentChunkResponse
 
 from ..src.utils.auth import (
@@ -21,8 +25,12 @@ from ..src.utils.auth import (
     get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES, create_user,
     validate_password_strength, get_user, get_user_by_email
 )
-from ..src.services.vector_service import VectorStore
-from backend.src.utils.text_process import extract_text_from_pdf, chunk_text
+from ..src.config.settings import get_settings
+from ..src.services.vector_service import vector_store
+from ..src.services.embedding_service import embedding_service
+from backend.src.utils.text_process import iter_pdf_pages, iter_chunks, iter_unique_chunks
+from backend.src.utils.file_process import BatchSpool, spool_upload_to_disk
+from backend.src.utils.exceptions import FileProcessingError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,11 +40,12 @@ load_dotenv()
 
 # Configuration constants
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-ALLOWED_FILE_TYPES = ['.pdf']
+ALLOWED_FILE_TYPES = ('.pdf',)
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
+settings = get_settings()
 
-app = FastAPI(title="RAG Application API", version="1.0.0")
+app = FastAPI(title="RAG Application API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware - more flexible configuration
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -52,14 +61,25 @@ app.add_middleware(
 async def startup_event():
     try:
         # Initialize database
-        init_db()
+        await init_db()
+        vector_store.batcher.start()
+        # The SIMD levels (AVX2, AVX512, NEON...) FAISS's distance kernels were built for
+        logger.info(f"FAISS compile options: {faiss.get_compile_options().strip()}")
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Failed to start application: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await vector_store.batcher.stop()
+    await vector_store.wait_for_compaction()
+    if vector_store.adds_since_checkpoint:
+        vector_store.checkpoint()
+    embedding_service.close()
+
 @app.post("/register", response_model=Token)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     try:
         # Validate password strength
         is_valid, error_message = validate_password_strength(user.password)
@@ -67,16 +87,16 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail=error_message)
         
         # Check if user exists
-        existing_user = get_user(db, user.username)
+        existing_user = await get_user(db, user.username)
         if existing_user:
             raise HTTPException(status_code=400, detail="Username already registered")
         
-        existing_email = get_user_by_email(db, user.email)
+        existing_email = await get_user_by_email(db, user.email)
         if existing_email:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create new user with salted password
-        db_user = create_user(db, user.username, user.email, user.password)
+        db_user = await create_user(db, user.username, user.email, user.password)
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -90,18 +110,18 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error during registration: {str(e)}")
         raise HTTPException(status_code=400, detail="Registration failed due to data conflict")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error during registration: {str(e)}")
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @app.post("/token", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     try:
-        user = authenticate_user(db, form_data.username, form_data.password)
+        user = await authenticate_user(db, form_data.username, form_data.password)
         if not user:
             logger.warning(f"Failed login attempt for username: {form_data.username}")
             raise HTTPException(
@@ -129,12 +149,12 @@ async def change_password(
     current_password: str,
     new_password: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Validate current password
-        from ..src.utils.auth import verify_password
-        if not verify_password(current_password, current_user.user_password, current_user.salt):
+        from ..src.utils.auth import verify_user_password
+        if not await verify_user_password(current_user, current_password):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
         # Validate new password strength
@@ -144,7 +164,7 @@ async def change_password(
         
         # Update password
         from ..src.utils.auth import update_user_password
-        if update_user_password(db, current_user, new_password):
+        if await update_user_password(db, current_user, new_password):
             logger.info(f"Password changed for user: {current_user.user_name}")
             return {"message": "Password changed successfully"}
         else:
@@ -160,31 +180,30 @@ async def change_password(
 async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    spool = BatchSpool()
     try:
         # Validate file type
-        if not any(file.filename.lower().endswith(ext) for ext in ALLOWED_FILE_TYPES):
+        if not file.filename.lower().endswith(ALLOWED_FILE_TYPES):
             raise HTTPException(
                 status_code=400, 
                 detail=f"Only {', '.join(ALLOWED_FILE_TYPES)} files are supported"
             )
         
-        # Read file content
-        content = await file.read()
-        
-        # Validate file size
-        if len(content) > MAX_FILE_SIZE:
+        # Validate file size up front when the client sent a length
+        if file.size is not None and file.size > MAX_FILE_SIZE:
             raise HTTPException(
                 status_code=413, 
                 detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
             )
         
         # Check for duplicate files (by filename and user)
-        existing_doc = db.query(Document).filter(
+        result = await db.execute(select(Document).where(
             Document.user_id == current_user.user_id,
             Document.doc_filename == file.filename
-        ).first()
+        ))
+        existing_doc = result.scalars().first()
         
         if existing_doc:
             raise HTTPException(
@@ -193,67 +212,95 @@ async def upload_file(
             )
        
         try:
-            text = extract_text_from_pdf(content)
-            if not text.strip():
-                raise HTTPException(status_code=400, detail="PDF appears to be empty or unreadable")
+            async with spool_upload_to_disk(file, MAX_FILE_SIZE, suffix=".pdf") as (pdf_path, file_size, file_sha256):
+                # Same bytes under another name: hand back the existing document instead of re-embedding
+                result = await db.execute(select(Document).where(
+                    Document.user_id == current_user.user_id,
+                    Document.doc_sha256 == file_sha256
+                ))
+                duplicate_doc = result.scalars().first()
+                if duplicate_doc:
+                    logger.info(f"Duplicate upload of document {duplicate_doc.doc_id} as {file.filename} by user {current_user.user_name}")
+                    return {
+                        "message": "File already uploaded",
+                        "document_id": duplicate_doc.doc_id,
+                        "chunks": duplicate_doc.chunk_count,
+                        "filename": duplicate_doc.doc_filename
+                    }
+                # Extraction, dedup and encoding all finish before the first write, so the
+                # transaction (and SQLite's write lock) only spans the inserts below; the
+                # batches wait on disk meanwhile rather than all in memory
+                chunk_stream = iter_unique_chunks(iter_chunks(iter_pdf_pages(pdf_path)))
+                chunk_count, has_text = 0, False
+                while batch := list(islice(chunk_stream, settings.EMBED_BATCH_SIZE)):
+                    chunk_count += len(batch)
+                    has_text = has_text or any(chunk_content.strip() for _, chunk_content, _ in batch)
+                    spool.append((batch, await vector_store.embed_texts_async([chunk_content for _, chunk_content, _ in batch])))
+        except FileProcessingError as e:
+            raise HTTPException(status_code=413, detail=e.message)
         except ValueError as e:
             logger.error(f"PDF extraction failed for {file.filename}: {str(e)}")
             raise HTTPException(status_code=400, detail=f"PDF processing failed: {str(e)}")
-        
-        # Create chunks
-        chunks = chunk_text(text)
-        if not chunks:
-            raise HTTPException(status_code=400, detail="No text chunks could be created from the document")
+
+        if not has_text:
+            raise HTTPException(status_code=400, detail="PDF appears to be empty or unreadable")
+
         document = Document(
             user_id=current_user.user_id,
             doc_filename=file.filename,
-            doc_size=len(content),
-            #chunk_count=len(chunks)
+            doc_size=file_size,
+            doc_sha256=file_sha256,
+            chunk_count=chunk_count
         )
         db.add(document)
-        db.commit()
-        db.refresh(document)
-
-        document.chunk_count = len(chunks)
-        db.commit()
-        db.refresh(document)
+        try:
+            await db.flush()
+        except IntegrityError:
+            # A concurrent upload of the same filename got past the pre-check and won the unique index
+            raise HTTPException(status_code=409, detail="A document with this filename already exists")
 
-        chunk_objects = []
-        chunk_texts = []
-        for i, chunk_content in enumerate(chunks):
-            chunk = Chunk(
-                chunk_id=i,  # composite key: chunk_id per doc
-                doc_id=document.doc_id,
-                chunk_idx=i,
-                chunk_content=chunk_content
-            )
-            chunk_objects.append(chunk)
-            chunk_texts.append(chunk_content)
-        db.add_all(chunk_objects)
-        db.commit()
-        chunk_keys = [(chunk.chunk_id, chunk.doc_id) for chunk in chunk_objects]
-        VectorStore.add_chunks(chunk_texts, chunk_keys)
+        pk_batches, next_chunk_id = [], 0
+        for batch, _ in spool:
+            rows = [
+                {
+                    "chunk_id": next_chunk_id + i,
+                    "doc_id": document.doc_id,
+                    "chunk_idx": position,
+                    "chunk_content": chunk_content,
+                    "chunk_minhash": signature.tobytes()
+                }
+                for i, (position, chunk_content, signature) in enumerate(batch)
+            ]
+            result = await db.execute(insert(Chunk).returning(Chunk.chunk_pk, sort_by_parameter_order=True), rows)
+            pk_batches.append(result.scalars().all())
+            next_chunk_id += len(batch)
+        await db.commit()
+        vector_store.add_embedding_batches(
+            (embeddings, chunk_pks) for chunk_pks, (_, embeddings) in zip(pk_batches, spool)
+        )
         logger.info(f"File uploaded successfully: {file.filename} by user {current_user.user_name}")
         return {
             "message": "File uploaded successfully", 
             "document_id": document.doc_id, 
-            "chunks": len(chunks),
+            "chunks": chunk_count,
             "filename": file.filename
         }
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error during file upload: {str(e)}")
         raise HTTPException(status_code=500, detail="File upload failed")
+    finally:
+        spool.close()
 
 @app.post("/query", response_model=QueryResponse)
 async def query_documents(
     query: QueryRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         if not query.question.strip():
@@ -262,62 +309,55 @@ async def query_documents(
         if len(query.question) > 1000:
             raise HTTPException(status_code=400, detail="Query too long (max 1000 characters)")
         
-        results = VectorStore.search(query.question, threshold=0.5, k=5)
+        query_embedding = vector_store.encode_query(query.question)
+        results = vector_store.search_embedding(query_embedding, threshold=0.5, k=5)
         
         if not results:
             logger.info(f"No results found for query: {query.question}")
-            query_log = QuestionsLogs(
-                user_id=current_user.user_id,
-                q_text=query.question,
-                ans_text="No relevant chunks found"
-            )
-            db.add(query_log)
-            db.commit()
-            return QueryResponse(chunks=[], total_chunks=0)
+            await db.execute(insert(QuestionsLogs), [{
+                "user_id": current_user.user_id,
+                "q_text": query.question,
+                "ans_text": "No relevant chunks found"
+            }])
+            await db.commit()
+            return Response(content=QueryResponse(chunks=[], total_chunks=0).model_dump_json(), media_type="application/json")
         
-        chunk_keys = [key for key, _ in results]  
-        chunks_data = db.query(Chunk).filter(
-            tuple_(Chunk.chunk_id, Chunk.doc_id).in_(chunk_keys)
-        ).all()
-        chunks = []
-        score_map = {key: score for key, score in results}
-        for chunk in chunks_data:
-            key = (chunk.chunk_id, chunk.doc_id)
-            if key in score_map:
-                chunk_response = DocumentChunkResponse(
-                    chunk_id=chunk.chunk_id,
-                    doc_id=chunk.doc_id,
-                    chunk_idx=chunk.chunk_idx,
-                    chunk_content=chunk.chunk_content,
-                    similarity_score=score_map[key]
-                )   
-                chunks.append(chunk_response)
-        chunks.sort(key=lambda x: x.similarity_score, reverse=True)
+        chunk_pks = [chunk_pk for chunk_pk, _ in results]
+        # Plain column rows skip ORM identity-map and instance-state bookkeeping
+        result = await db.execute(
+            select(Chunk.chunk_pk, Chunk.chunk_id, Chunk.doc_id, Chunk.chunk_idx, Chunk.chunk_content)
+            .where(Chunk.chunk_pk.in_(chunk_pks))
+        )
+        by_pk = {chunk.chunk_pk: chunk for chunk in result.all()}
+        # results arrive ranked by score from the vector store, so walking them keeps the order
+        ranked = [(chunk_pk, score) for chunk_pk, score in results if chunk_pk in by_pk]
+        chunks = [
+            DocumentChunkResponse(**by_pk[chunk_pk]._mapping, similarity_score=score)
+            for chunk_pk, score in ranked
+        ]
 
         if chunks:
-            best_chunk = chunks[0]
-            query_log = QuestionsLogs(
-                user_id=current_user.user_id,
-                q_text=query.question,
-                chunk_id=best_chunk.chunk_id,
-                chunk_doc_id=best_chunk.doc_id,
-                ans_text=f"Found {len(chunks)} relevant chunks"
-            )
-            db.add(query_log)
-            db.commit()
+            await db.execute(insert(QuestionsLogs), [{
+                "user_id": current_user.user_id,
+                "q_text": query.question,
+                "chunk_pk": ranked[0][0],
+                "ans_text": f"Found {len(chunks)} relevant chunks"
+            }])
+            await db.commit()
 
         logger.info(f"Query processed successfully: {len(chunks)} chunks returned")
-        return QueryResponse(chunks=chunks, total_chunks=len(chunks))
+        # pydantic-core writes the JSON directly, skipping FastAPI's dict dump and re-validation
+        return Response(content=QueryResponse(chunks=chunks, total_chunks=len(chunks)).model_dump_json(), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Unexpected error during query: {str(e)}")
         raise HTTPException(status_code=500, detail="Query processing failed")
 
-@app.get("/documents")
+@app.get("/documents", response_model=DocumentListResponse)
 async def get_documents(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
     page_size: int = DEFAULT_PAGE_SIZE
 ):
@@ -331,25 +371,40 @@ async def get_documents(
         # Calculate offset
         offset = (page - 1) * page_size
         
-        # Get documents with pagination
-        documents = db.query(Document).filter(
-            Document.user_id == current_user.user_id
-        ).order_by(Document.doc_upload_time.desc()).offset(offset).limit(page_size).all()
+        # COUNT(*) OVER () returns the total alongside the page in one round-trip
+        result = await db.execute(
+            select(Document, func.count().over().label("total"))
+            .options(raiseload('*'))
+            .where(Document.user_id == current_user.user_id)
+            .order_by(Document.doc_upload_time.desc())
+            .offset(offset)
+            .limit(page_size)
+        )
+        rows = result.all()
+        documents = [row[0] for row in rows]
 
         # Extract document IDs
         document_ids = [doc.doc_id for doc in documents]
         
-        # Get total count
-        total_count = db.query(Document).filter(Document.user_id == current_user.user_id).count()
+        if rows:
+            total_count = rows[0].total
+        elif offset:
+            # Past the last page the window has no rows to ride on
+            total_count = await db.scalar(select(func.count()).select_from(Document).where(Document.user_id == current_user.user_id))
+        else:
+            total_count = 0
         
-        return {
-            "documents_id": document_ids,
-            "documents": documents,
-            "total_count": total_count,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total_count + page_size - 1) // page_size
-        }
+        # Validated straight off the ORM rows and written to JSON by pydantic-core,
+        # bypassing jsonable_encoder's per-attribute walk of every Document
+        page_response = DocumentListResponse(
+            documents_id=document_ids,
+            documents=documents,
+            total_count=total_count,
+            page=page,
+            page_size=page_size,
+            total_pages=(total_count + page_size - 1) // page_size
+        )
+        return Response(content=page_response.model_dump_json(), media_type="application/json")
         
     except HTTPException:
         raise
@@ -360,7 +415,7 @@ async def get_documents(
 @app.get("/queries")
 async def get_queries(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
     page_size: int = DEFAULT_PAGE_SIZE
 ):
@@ -374,13 +429,25 @@ async def get_queries(
         # Calculate offset
         offset = (page - 1) * page_size
         
-        # Get queries with pagination
-        queries = db.query(QuestionsLogs).filter(
-            QuestionsLogs.user_id == current_user.user_id
-        ).order_by(QuestionsLogs.q_asked_at.desc()).offset(offset).limit(page_size).all()
+        # COUNT(*) OVER () returns the total alongside the page in one round-trip
+        result = await db.execute(
+            select(QuestionsLogs, func.count().over().label("total"))
+            .options(raiseload('*'))
+            .where(QuestionsLogs.user_id == current_user.user_id)
+            .order_by(QuestionsLogs.q_asked_at.desc())
+            .offset(offset)
+            .limit(page_size)
+        )
+        rows = result.all()
+        queries = [row[0] for row in rows]
         
-        # Get total count
-        total_count = db.query(QuestionsLogs).filter(QuestionsLogs.user_id == current_user.user_id).count()
+        if rows:
+            total_count = rows[0].total
+        elif offset:
+            # Past the last page the window has no rows to ride on
+            total_count = await db.scalar(select(func.count()).select_from(QuestionsLogs).where(QuestionsLogs.user_id == current_user.user_id))
+        else:
+            total_count = 0
         
         return {
             "queries": queries,
@@ -400,34 +467,35 @@ async def get_queries(
 async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        document = db.query(Document).filter(
+        result = await db.execute(select(Document).where(
             Document.doc_id == document_id,  # Fixed from Document.id
             Document.user_id == current_user.user_id
-        ).first()
+        ))
+        document = result.scalars().first()
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
-        chunks = db.query(Chunk).filter(Chunk.doc_id == document_id).all()
-        chunk_keys = [(chunk.chunk_id, chunk.doc_id) for chunk in chunks]
-        if chunk_keys:
-            VectorStore.delete_chunks(chunk_keys)
-        db.query(Chunk).filter(Chunk.doc_id == document_id).delete()
-        db.delete(document)
-        db.commit()
+        result = await db.execute(select(Chunk.chunk_pk).where(Chunk.doc_id == document_id))
+        chunk_pks = result.scalars().all()
+        if chunk_pks:
+            vector_store.delete_chunks(chunk_pks)
+        # ON DELETE CASCADE drops the chunk rows in the same statement
+        await db.delete(document)
+        await db.commit()
         logger.info(f"Document deleted: {document_id} by user {current_user.user_name}")
         return {"message": "Document deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting document: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to delete document")
 
 @app.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
-    db.refresh(current_user)    
+async def get_current_user_info(current_user: User = Depends(get_current_user),db: AsyncSession = Depends(get_db)):
+    await db.refresh(current_user)    
     return {
         "id": current_user.user_id,
         "username": current_user.user_name,
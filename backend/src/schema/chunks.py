@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Float, LargeBinary, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import os
@@ -7,14 +7,21 @@ from ..config.database import Base
 
 class Chunk(Base):
     __tablename__ = "chunks"
+    # SQLite only auto-increments a column declared exactly INTEGER PRIMARY KEY
+    chunk_pk = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # Dense 0..n-1 over the chunks kept for the document
     chunk_id = Column(Integer, nullable=False)
-    doc_id = Column(Integer, ForeignKey("documents.doc_id"), nullable=False)
+    doc_id = Column(Integer, ForeignKey("documents.doc_id", ondelete="CASCADE"), nullable=False)
+    # Position in the document's chunk sequence before near-duplicate removal; gaps are dropped chunks
     chunk_idx = Column(Integer, nullable=False)
     chunk_content = Column(Text, nullable=False)
+    chunk_minhash = Column(LargeBinary, nullable=True)
     __table_args__ = (
-        PrimaryKeyConstraint('chunk_id', 'doc_id'),
+        Index('ix_chunk_doc', 'doc_id', 'chunk_id', unique=True),
+        # Never hand a deleted chunk_pk out again: the vector store keeps deleted ids as tombstones
+        {"sqlite_autoincrement": True},
     )
 
     document = relationship("Document", back_populates="chunks")
-    questions_logs = relationship("QuestionsLogs", back_populates="chunk")
+    questions_logs = relationship("QuestionsLogs", back_populates="chunk", passive_deletes=True, lazy="raise")
 
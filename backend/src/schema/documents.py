@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import os
 from backend.src.config.database import Base
 
@@ -11,7 +11,13 @@ class Document(Base):
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     doc_filename = Column(String, nullable=False)
     doc_size = Column(Integer, nullable=False)
-    doc_upload_time = Column(DateTime, nullable=False, default=datetime.utcnow)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    doc_sha256 = Column(String(64), index=True)
+    doc_upload_time = Column(DateTime, nullable=False, server_default=func.now())
+    __table_args__ = (
+        Index('ix_doc_user_time', 'user_id', doc_upload_time.desc()),
+        Index('ix_doc_user_filename', 'user_id', 'doc_filename', unique=True),
+    )
     
     user = relationship("User", back_populates="documents")
-    chunks = relationship("Chunk", back_populates="document", cascade="all, delete-orphan")
\ No newline at end of file
+    chunks = relationship("Chunk", back_populates="document", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from enum import Enum
@@ -11,15 +11,7 @@ class DocumentChunk(BaseModel):
     chunk_idx: int
     chunk_content: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
-class DocumentChunkResponse(BaseModel):
-    chunk_id: int
-    doc_id: int
-    chunk_idx: int
-    chunk_content: str
-    similarity_score: Optional[float] = None
-    
-    class Config:
-        from_attributes = True
\ No newline at end of file
+class DocumentChunkResponse(DocumentChunk):
+    similarity_score: Optional[float] = None
\ No newline at end of file
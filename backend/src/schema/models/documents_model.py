@@ -1,34 +1,28 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
 from enum import Enum
 import re
 
 
 class DocumentUpload(BaseModel):
-    filename: str
+    filename: Annotated[str, Field(pattern=r'(?i)^.+\.(txt|pdf|docx|md)$')]
     chunk_count: int
-
-    @field_validator('filename')
-    @classmethod
-    def validate_filename(cls, v):
-        if not v.strip():
-            raise ValueError('Filename cannot be empty')
-        valid_extensions = ['.txt', '.pdf', '.docx', '.md']
-        if not any(v.lower().endswith(ext) for ext in valid_extensions):
-            raise ValueError(f'File must have one of these extensions: {", ".join(valid_extensions)}')
-        return v
     
 class DocumentResponse(BaseModel):
     doc_id: int  
+    user_id: int
     doc_filename: str 
+    doc_size: int
     doc_upload_time: datetime
     chunk_count: int
-
-class DocumentResponse(BaseModel):
-    user_id: int
-    doc_size: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
+class DocumentListResponse(BaseModel):
+    documents_id: List[int]
+    documents: List[DocumentResponse]
+    total_count: int
+    page: int
+    page_size: int
+    total_pages: int
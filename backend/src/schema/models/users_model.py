@@ -1,20 +1,23 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from enum import Enum
 import re
 
+_DIGIT_RE = re.compile(r'\d')
+_UPPER_RE = re.compile(r'[A-Z]')
+_LOWER_RE = re.compile(r'[a-z]')
+
 
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
     password: str
 
-    @field_validator('email')
+    @field_validator('email', mode='after')
+    @classmethod
     def validate_email(cls, v):
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, v):
-            raise ValueError('Invalid email format')
+        # EmailStr has already validated the address; only normalise its case
         return v.lower()
 
     @field_validator('username')
@@ -33,11 +36,13 @@ class UserCreate(BaseModel):
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isupper() for c in v):
+        # The precompiled ASCII classes settle most passwords in C; only non-ASCII ones fall back
+        # to str.isupper()/islower() per character, which decide caseless and titlecase letters
+        if not _UPPER_RE.search(v) and (v.isascii() or not any(c.isupper() for c in v)):
             raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
+        if not _LOWER_RE.search(v) and (v.isascii() or not any(c.islower() for c in v)):
             raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
+        if not _DIGIT_RE.search(v):
             raise ValueError('Password must contain at least one digit')
         return v
     
@@ -51,8 +56,7 @@ class User(BaseModel):
     email: str
     user_created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserResponse(BaseModel):
     id: int
@@ -60,8 +64,7 @@ class UserResponse(BaseModel):
     email: str
     response_created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Token(BaseModel):
     access_token: str
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import os
 from backend.src.config.database import Base
 
@@ -10,14 +10,14 @@ class QuestionsLogs(Base):
     q_id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     q_text = Column(Text, nullable=False)
-    q_asked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    chunk_id = Column(Integer, nullable=True)  
-    chunk_doc_id = Column(Integer, nullable=True)
+    q_asked_at = Column(DateTime, nullable=False, server_default=func.now())
+    chunk_pk = Column(BigInteger().with_variant(Integer, "sqlite"), ForeignKey("chunks.chunk_pk", ondelete="SET NULL"), nullable=True)
     ans_text = Column(Text)
-    ans_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ans_at = Column(DateTime, nullable=False, server_default=func.now())
 
     __table_args__ = (
-        ForeignKeyConstraint(['chunk_id', 'chunk_doc_id'], ['chunks.chunk_id', 'chunks.doc_id']),
+        Index('ix_qlogs_chunk', 'chunk_pk'),
+        Index('ix_qlogs_user_time', 'user_id', q_asked_at.desc()),
     )
 
     user = relationship("User", back_populates="questions_logs")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Text, Float, ForeignKey, PrimaryKeyConstraint, ForeignKeyConstraint
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import os
 from backend.src.config.database import Base
 
@@ -12,7 +12,10 @@ class User(Base):
     user_email = Column(String, nullable=False)
     user_password = Column(String, nullable=False)
     salt = Column(String, nullable=False)
-    user_created_at = Column(DateTime, default=datetime.utcnow)
+    # 4-byte key id + keyed HMAC-SHA256 of password+salt; lets wrong passwords be rejected without running bcrypt
+    user_pw_hmac = Column(LargeBinary(36), nullable=True)
+    user_created_at = Column(DateTime, server_default=func.now())
    
-    documents = relationship("Document", back_populates="user")
-    questions_logs = relationship("QuestionsLogs", back_populates="user")
\ No newline at end of file
+    # Collections must be loaded explicitly (selectinload) rather than lazily per row
+    documents = relationship("Document", back_populates="user", lazy="raise")
+    questions_logs = relationship("QuestionsLogs", back_populates="user", lazy="raise")
\ No newline at end of file
@@ -1,13 +1,24 @@
-from .auth_service import AuthService
-from .document_service import DocumentService
-from .vector_service import VectorService
-from .chat_service import ChatService
-from .embedding_service import EmbeddingService
+from importlib import import_module
+
+# Submodules load the embedding model and FAISS index at import time, so each
+# service is only imported once it is first looked up (PEP 562)
+_EXPORTS = {
+    'AuthService': '.auth_service',
+    'DocumentService': '.document_service',
+    'VectorStore': '.vector_service',
+    'ChatService': '.chat_service',
+    'EmbeddingService': '.embedding_service'
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'AuthService',
     'DocumentService',
-    'VectorService',
+    'VectorStore',
     'ChatService',
     'EmbeddingService'
-]
\ No newline at end of file
+]
@@ -1,26 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response
 from ..schema.models.question_logs_model import QueryRequest, QueryResponse, ErrorResponse, QueryCreate, QueryHistory, QueryHistoryResponse
 from ..schema.models.users_model import User
 from ..schema.models.chunks_model import DocumentChunkResponse, DocumentChunk
 from ..schema.question_logs import QuestionsLogs
 from ..schema.chunks import Chunk
 from datetime import datetime, timedelta
-from sqlalchemy import tuple_
+from sqlalchemy import insert, select, func
 from utils.auth import get_current_user
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from ..config.database import get_db
-from ..config.settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, vector_store
+from ..config.settings import get_settings
+from .vector_service import vector_store
 import logging
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class ChatService:
     async def query_documents(
     query: QueryRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ):
         try:
             if not query.question.strip():
@@ -29,52 +32,45 @@ class ChatService:
             if len(query.question) > 1000:
                 raise HTTPException(status_code=400, detail="Query too long (max 1000 characters)")
             
-            results = vector_store.search(query.question, threshold=0.5, k=5)
+            query_embedding = vector_store.encode_query(query.question)
+            results = vector_store.search_embedding(query_embedding, threshold=0.5, k=5)
             
             if not results:
                 logger.info(f"No results found for query: {query.question}")
-                query_log = QuestionsLogs(
-                    user_id=current_user.user_id,
-                    q_text=query.question,
-                    ans_text="No relevant chunks found"
-                )
-                db.add(query_log)
-                db.commit()
-                return QueryResponse(chunks=[], total_chunks=0)
+                await db.execute(insert(QuestionsLogs), [{
+                    "user_id": current_user.user_id,
+                    "q_text": query.question,
+                    "ans_text": "No relevant chunks found"
+                }])
+                await db.commit()
+                return Response(content=QueryResponse(chunks=[], total_chunks=0).model_dump_json(), media_type="application/json")
             
-            chunk_keys = [key for key, _ in results]  
-            chunks_data = db.query(Chunk).filter(
-                tuple_(Chunk.chunk_id, Chunk.doc_id).in_(chunk_keys)
-            ).all()
-            chunks = []
-            score_map = {key: score for key, score in results}
-            for chunk in chunks_data:
-                key = (chunk.chunk_id, chunk.doc_id)
-                if key in score_map:
-                    chunk_response = DocumentChunkResponse(
-                        chunk_id=chunk.chunk_id,
-                        doc_id=chunk.doc_id,
-                        chunk_idx=chunk.chunk_idx,
-                        chunk_content=chunk.chunk_content,
-                        similarity_score=score_map[key]
-                    )   
-                    chunks.append(chunk_response)
-            chunks.sort(key=lambda x: x.similarity_score, reverse=True)
+            chunk_pks = [chunk_pk for chunk_pk, _ in results]
+            # Plain column rows skip ORM identity-map and instance-state bookkeeping
+            result = await db.execute(
+                select(Chunk.chunk_pk, Chunk.chunk_id, Chunk.doc_id, Chunk.chunk_idx, Chunk.chunk_content)
+                .where(Chunk.chunk_pk.in_(chunk_pks))
+            )
+            by_pk = {chunk.chunk_pk: chunk for chunk in result.all()}
+            # results arrive ranked by score from the vector store, so walking them keeps the order
+            ranked = [(chunk_pk, score) for chunk_pk, score in results if chunk_pk in by_pk]
+            chunks = [
+                DocumentChunkResponse(**by_pk[chunk_pk]._mapping, similarity_score=score)
+                for chunk_pk, score in ranked
+            ]
 
             if chunks:
-                best_chunk = chunks[0]
-                query_log = QuestionsLogs(
-                    user_id=current_user.user_id,
-                    q_text=query.question,
-                    chunk_id=best_chunk.chunk_id,
-                    chunk_doc_id=best_chunk.doc_id,
-                    ans_text=f"Found {len(chunks)} relevant chunks"
-                )
-                db.add(query_log)
-                db.commit()
+                await db.execute(insert(QuestionsLogs), [{
+                    "user_id": current_user.user_id,
+                    "q_text": query.question,
+                    "chunk_pk": ranked[0][0],
+                    "ans_text": f"Found {len(chunks)} relevant chunks"
+                }])
+                await db.commit()
 
             logger.info(f"Query processed successfully: {len(chunks)} chunks returned")
-            return QueryResponse(chunks=chunks, total_chunks=len(chunks))
+            # pydantic-core writes the JSON directly, skipping FastAPI's dict dump and re-validation
+            return Response(content=QueryResponse(chunks=chunks, total_chunks=len(chunks)).model_dump_json(), media_type="application/json")
         except HTTPException:
             raise
         except Exception as e:
@@ -84,23 +80,37 @@ class ChatService:
     
     async def get_queries(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
-    page_size: int = DEFAULT_PAGE_SIZE
+    page_size: int = settings.DEFAULT_PAGE_SIZE
     ):
         try:
             if page < 1:
                 raise HTTPException(status_code=400, detail="Page must be >= 1")
-            if page_size < 1 or page_size > MAX_PAGE_SIZE:
-                raise HTTPException(status_code=400, detail=f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+            if page_size < 1 or page_size > settings.MAX_PAGE_SIZE:
+                raise HTTPException(status_code=400, detail=f"Page size must be between 1 and {settings.MAX_PAGE_SIZE}")
             
             offset = (page - 1) * page_size
             
-            queries = db.query(QuestionsLogs).filter(
-                QuestionsLogs.user_id == current_user.user_id
-            ).order_by(QuestionsLogs.q_asked_at.desc()).offset(offset).limit(page_size).all()
+            # COUNT(*) OVER () returns the total alongside the page in one round-trip
+            result = await db.execute(
+                select(QuestionsLogs, func.count().over().label("total"))
+                .options(raiseload('*'))
+                .where(QuestionsLogs.user_id == current_user.user_id)
+                .order_by(QuestionsLogs.q_asked_at.desc())
+                .offset(offset)
+                .limit(page_size)
+            )
+            rows = result.all()
+            queries = [row[0] for row in rows]
             
-            total_count = db.query(QuestionsLogs).filter(QuestionsLogs.user_id == current_user.user_id).count()
+            if rows:
+                total_count = rows[0].total
+            elif offset:
+                # Past the last page the window has no rows to ride on
+                total_count = await db.scalar(select(func.count()).select_from(QuestionsLogs).where(QuestionsLogs.user_id == current_user.user_id))
+            else:
+                total_count = 0
             
             return {
                 "queries": queries,
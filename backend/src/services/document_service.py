@@ -1,45 +1,56 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response
 from ..schema.models.users_model import UserCreate, UserLogin, UserResponse, TokenData, Token, User
+from ..schema.models.documents_model import DocumentListResponse
 from datetime import datetime, timedelta
+from itertools import islice
 from typing import Optional, Dict, Any
 from utils.auth import create_access_token, verify_password, get_password_hash, verify_token, validate_password_strength, get_user_by_email, get_user, create_user, authenticate_user, get_current_user
 from ..schema.documents import Document
 from ..schema.chunks import Chunk
-from ..utils.text_process import extract_text_from_pdf, chunk_text
-from sqlalchemy.orm import Session
+from .vector_service import vector_store
+from ..utils.text_process import iter_pdf_pages, iter_chunks, iter_unique_chunks
+from ..utils.file_process import BatchSpool, spool_upload_to_disk
+from ..utils.exceptions import FileProcessingError
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from ..config.database import get_db
-from ..config.settings import ALLOWED_FILE_TYPES, MAX_FILE_SIZE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, vector_store
+from ..config.settings import get_settings
 import logging
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+settings = get_settings()
+# str.endswith takes a tuple and checks every extension in one C call
+ALLOWED_EXTENSIONS = tuple(settings.ALLOWED_FILE_TYPES)
 
 class DocumentService:
     async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+        spool = BatchSpool()
         try:
-            if not any(file.filename.lower().endswith(ext) for ext in ALLOWED_FILE_TYPES):
+            if not file.filename.lower().endswith(ALLOWED_EXTENSIONS):
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Only {', '.join(ALLOWED_FILE_TYPES)} files are supported"
+                    detail=f"Only {', '.join(settings.ALLOWED_FILE_TYPES)} files are supported"
                 )
             
-            content = await file.read()
-            
-            if len(content) > MAX_FILE_SIZE:
+            if file.size is not None and file.size > settings.MAX_FILE_SIZE:
                 raise HTTPException(
                     status_code=413, 
-                    detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+                    detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE // (1024*1024)}MB"
                 )
             
-            existing_doc = db.query(Document).filter(
+            result = await db.execute(select(Document).where(
                 Document.user_id == current_user.user_id,
                 Document.doc_filename == file.filename
-            ).first()
+            ))
+            existing_doc = result.scalars().first()
             
             if existing_doc:
                 raise HTTPException(
@@ -48,91 +59,138 @@ class DocumentService:
                 )
         
             try:
-                text = extract_text_from_pdf(content)
-                if not text.strip():
-                    raise HTTPException(status_code=400, detail="PDF appears to be empty or unreadable")
+                async with spool_upload_to_disk(file, settings.MAX_FILE_SIZE, suffix=".pdf") as (pdf_path, file_size, file_sha256):
+                    # Same bytes under another name: hand back the existing document instead of re-embedding
+                    result = await db.execute(select(Document).where(
+                        Document.user_id == current_user.user_id,
+                        Document.doc_sha256 == file_sha256
+                    ))
+                    duplicate_doc = result.scalars().first()
+                    if duplicate_doc:
+                        logger.info(f"Duplicate upload of document {duplicate_doc.doc_id} as {file.filename} by user {current_user.user_name}")
+                        return {
+                            "message": "File already uploaded",
+                            "document_id": duplicate_doc.doc_id,
+                            "chunks": duplicate_doc.chunk_count,
+                            "filename": duplicate_doc.doc_filename
+                        }
+                    # Extraction, dedup and encoding all finish before the first write, so the
+                    # transaction (and SQLite's write lock) only spans the inserts below; the
+                    # batches wait on disk meanwhile rather than all in memory
+                    chunk_stream = iter_unique_chunks(iter_chunks(iter_pdf_pages(pdf_path)))
+                    chunk_count, has_text = 0, False
+                    while batch := list(islice(chunk_stream, settings.EMBED_BATCH_SIZE)):
+                        chunk_count += len(batch)
+                        has_text = has_text or any(chunk_content.strip() for _, chunk_content, _ in batch)
+                        spool.append((batch, await vector_store.embed_texts_async([chunk_content for _, chunk_content, _ in batch])))
+            except FileProcessingError as e:
+                raise HTTPException(status_code=413, detail=e.message)
             except ValueError as e:
                 logger.error(f"PDF extraction failed for {file.filename}: {str(e)}")
                 raise HTTPException(status_code=400, detail=f"PDF processing failed: {str(e)}")
-            
-            chunks = chunk_text(text)
-            if not chunks:
-                raise HTTPException(status_code=400, detail="No text chunks could be created from the document")
+
+            if not has_text:
+                raise HTTPException(status_code=400, detail="PDF appears to be empty or unreadable")
+
             document = Document(
                 user_id=current_user.user_id,
                 doc_filename=file.filename,
-                doc_size=len(content),
+                doc_size=file_size,
+                doc_sha256=file_sha256,
+                chunk_count=chunk_count
             )
             db.add(document)
-            db.commit()
-            db.refresh(document)
-
-            document.chunk_count = len(chunks)
-            db.commit()
-            db.refresh(document)
+            try:
+                await db.flush()
+            except IntegrityError:
+                # A concurrent upload of the same filename got past the pre-check and won the unique index
+                raise HTTPException(status_code=409, detail="A document with this filename already exists")
 
-            chunk_objects = []
-            chunk_texts = []
-            for i, chunk_content in enumerate(chunks):
-                chunk = Chunk(
-                    chunk_id=i, 
-                    doc_id=document.doc_id,
-                    chunk_idx=i,
-                    chunk_content=chunk_content
-                )
-                chunk_objects.append(chunk)
-                chunk_texts.append(chunk_content)
-            db.add_all(chunk_objects)
-            db.commit()
-            chunk_keys = [(chunk.chunk_id, chunk.doc_id) for chunk in chunk_objects]
-            vector_store.add_chunks(chunk_texts, chunk_keys)
+            pk_batches, next_chunk_id = [], 0
+            for batch, _ in spool:
+                rows = [
+                    {
+                        "chunk_id": next_chunk_id + i,
+                        "doc_id": document.doc_id,
+                        "chunk_idx": position,
+                        "chunk_content": chunk_content,
+                        "chunk_minhash": signature.tobytes()
+                    }
+                    for i, (position, chunk_content, signature) in enumerate(batch)
+                ]
+                result = await db.execute(insert(Chunk).returning(Chunk.chunk_pk, sort_by_parameter_order=True), rows)
+                pk_batches.append(result.scalars().all())
+                next_chunk_id += len(batch)
+            await db.commit()
+            vector_store.add_embedding_batches(
+                (embeddings, chunk_pks) for chunk_pks, (_, embeddings) in zip(pk_batches, spool)
+            )
             logger.info(f"File uploaded successfully: {file.filename} by user {current_user.user_name}")
             return {
                 "message": "File uploaded successfully", 
                 "document_id": document.doc_id, 
-                "chunks": len(chunks),
+                "chunks": chunk_count,
                 "filename": file.filename
             }
             
         except HTTPException:
-            db.rollback()
+            await db.rollback()
             raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Unexpected error during file upload: {str(e)}")
             raise HTTPException(status_code=500, detail="File upload failed")
+        finally:
+            spool.close()
 
 
     async def get_documents(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
-    page_size: int = DEFAULT_PAGE_SIZE
+    page_size: int = settings.DEFAULT_PAGE_SIZE
     ):
         try:
             if page < 1:
                 raise HTTPException(status_code=400, detail="Page must be >= 1")
-            if page_size < 1 or page_size > MAX_PAGE_SIZE:
-                raise HTTPException(status_code=400, detail=f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+            if page_size < 1 or page_size > settings.MAX_PAGE_SIZE:
+                raise HTTPException(status_code=400, detail=f"Page size must be between 1 and {settings.MAX_PAGE_SIZE}")
             
             offset = (page - 1) * page_size
             
-            documents = db.query(Document).filter(
-                Document.user_id == current_user.user_id
-            ).order_by(Document.doc_upload_time.desc()).offset(offset).limit(page_size).all()
+            # COUNT(*) OVER () returns the total alongside the page in one round-trip
+            result = await db.execute(
+                select(Document, func.count().over().label("total"))
+                .options(raiseload('*'))
+                .where(Document.user_id == current_user.user_id)
+                .order_by(Document.doc_upload_time.desc())
+                .offset(offset)
+                .limit(page_size)
+            )
+            rows = result.all()
+            documents = [row[0] for row in rows]
 
             document_ids = [doc.doc_id for doc in documents]
             
-            total_count = db.query(Document).filter(Document.user_id == current_user.user_id).count()
+            if rows:
+                total_count = rows[0].total
+            elif offset:
+                # Past the last page the window has no rows to ride on
+                total_count = await db.scalar(select(func.count()).select_from(Document).where(Document.user_id == current_user.user_id))
+            else:
+                total_count = 0
             
-            return {
-                "documents_id": document_ids,
-                "documents": documents,
-                "total_count": total_count,
-                "page": page,
-                "page_size": page_size,
-                "total_pages": (total_count + page_size - 1) // page_size
-            }
+            # Validated straight off the ORM rows and written to JSON by pydantic-core,
+            # bypassing jsonable_encoder's per-attribute walk of every Document
+            page_response = DocumentListResponse(
+                documents_id=document_ids,
+                documents=documents,
+                total_count=total_count,
+                page=page,
+                page_size=page_size,
+                total_pages=(total_count + page_size - 1) // page_size
+            )
+            return Response(content=page_response.model_dump_json(), media_type="application/json")
             
         except HTTPException:
             raise
@@ -144,28 +202,29 @@ class DocumentService:
     async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ):
         try:
-            document = db.query(Document).filter(
+            result = await db.execute(select(Document).where(
                 Document.doc_id == document_id,  
                 Document.user_id == current_user.user_id
-            ).first()
+            ))
+            document = result.scalars().first()
             if not document:
                 raise HTTPException(status_code=404, detail="Document not found")
-            chunks = db.query(Chunk).filter(Chunk.doc_id == document_id).all()
-            chunk_keys = [(chunk.chunk_id, chunk.doc_id) for chunk in chunks]
-            if chunk_keys:
-                vector_store.delete_chunks(chunk_keys)
-            db.query(Chunk).filter(Chunk.doc_id == document_id).delete()
-            db.delete(document)
-            db.commit()
+            result = await db.execute(select(Chunk.chunk_pk).where(Chunk.doc_id == document_id))
+            chunk_pks = result.scalars().all()
+            if chunk_pks:
+                vector_store.delete_chunks(chunk_pks)
+            # ON DELETE CASCADE drops the chunk rows in the same statement
+            await db.delete(document)
+            await db.commit()
             logger.info(f"Document deleted: {document_id} by user {current_user.user_name}")
             return {"message": "Document deleted successfully"}
         except HTTPException:
             raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error deleting document: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to delete document")
 
@@ -1,27 +1,80 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from ..config.settings import settings  
-from typing import List
+import torch
+import os
+import threading
+from ..config.settings import get_settings
+from typing import List, Optional
+
+settings = get_settings()
 
 class EmbeddingService:
     def __init__(self):
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model = SentenceTransformer(settings.EMBEDDING_MODEL, device=self.device)
+        if self.device == "cuda":
+            # FP16 weights run the encoder on tensor cores and halve its memory
+            self.model.half()
+        else:
+            torch.set_num_threads(os.cpu_count() or 1)
+        self.workers = settings.EMBED_WORKERS if self.device == "cpu" else 0
+        self.pool: Optional[dict] = None
+        # The pool's input/output queues are shared, so only one batch may be in flight
+        self.pool_lock = threading.Lock()
+
+    def _get_pool(self) -> dict:
+        if self.pool is None:
+            # Each worker gets an equal share of the cores instead of all of them competing for every core
+            threads = str(max(1, (os.cpu_count() or 1) // self.workers))
+            previous = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = threads
+            try:
+                self.pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+            finally:
+                if previous is None:
+                    os.environ.pop("OMP_NUM_THREADS", None)
+                else:
+                    os.environ["OMP_NUM_THREADS"] = previous
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
 
-    def get_embeddings(self, text: List[str]) -> np.ndarray:
-        embeddings = self.model.encode(text)
-        return embeddings
+    def get_embeddings(self, text: List[str], batch_size: int = 64) -> np.ndarray:
+        if self.workers > 1 and len(text) >= settings.EMBED_MULTI_PROCESS_MIN:
+            with self.pool_lock:
+                # Shards the batch across the worker processes, sidestepping the GIL
+                embeddings = self.model.encode_multi_process(
+                    text,
+                    self._get_pool(),
+                    batch_size=batch_size,
+                    chunk_size=-(-len(text) // self.workers),
+                    normalize_embeddings=True
+                )
+            return embeddings.astype(np.float32, copy=False)
+
+        # The L2 normalize is fused into the encoder's pooling step; the cast only
+        # copies when the FP16 GPU model hands back float16
+        embeddings = self.model.encode(
+            text,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
     
     def get_single_embedding(self, text: str) -> np.ndarray:
-        embedding = self.model.encode([text])
-        return embedding[0]
+        return self.get_embeddings([text])[0]
     
     def calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
-        dot_product = np.dot(embedding1, embedding2)
-        norm_a = np.linalg.norm(embedding1)
-        norm_b = np.linalg.norm(embedding2)
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        somilarity = dot_product / (norm_a * norm_b)
-        return float(somilarity)
+        # Embeddings leave get_embeddings unit-length, so cosine similarity is the dot product
+        return float(np.dot(embedding1, embedding2))
+
+    def calculate_similarities(self, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        # (K, dim) @ (dim,) scores every candidate in one BLAS call
+        return candidates @ query
     
 embedding_service = EmbeddingService()
\ No newline at end of file
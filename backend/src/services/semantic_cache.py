@@ -0,0 +1,79 @@
+import faiss
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+Hits = List[Tuple[int, float]]
+
+class SemanticCache:
+    """
+    Clusters past query embeddings around centroids, each holding the chunk hits for that cluster.
+    """
+    def __init__(self, dimension: int, threshold: float = 0.86, max_entries: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # Centroids are kept L2-normalised, so inner product is cosine similarity
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        # centroid id -> [centroid, member count, k, hits, visits]; members weigh the running mean,
+        # visits (puts and cache hits) decide eviction
+        self.entries: Dict[int, list] = {}
+        self._next_id = 0
+
+    def _nearest(self, embedding: np.ndarray) -> Optional[int]:
+        if self.index.ntotal == 0:
+            return None
+
+        scores, ids = self.index.search(embedding, 1)
+        entry_id = int(ids[0][0])
+        if entry_id == -1 or scores[0][0] < self.threshold:
+            return None
+        return entry_id
+
+    def get(self, embedding: np.ndarray, k: int) -> Optional[Hits]:
+        embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+        entry_id = self._nearest(embedding)
+        if entry_id is None:
+            return None
+
+        entry = self.entries[entry_id]
+        if entry[2] < k:
+            return None
+
+        entry[4] += 1
+        return entry[3][:k]
+
+    def put(self, embedding: np.ndarray, k: int, hits: Hits):
+        embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+        entry_id = self._nearest(embedding)
+        if entry_id is None:
+            self._add(embedding[0].copy(), 1, k, hits, 1)
+            return
+
+        # Fold the query into its cluster: running mean, re-normalised back onto the unit sphere
+        centroid, count, cached_k, cached_hits, visits = self.entries[entry_id]
+        centroid = (centroid * count + embedding[0]) / (count + 1)
+        centroid /= np.linalg.norm(centroid)
+        self._remove(entry_id)
+        if cached_k >= k:
+            k, hits = cached_k, cached_hits
+        self._add(centroid.astype(np.float32, copy=False), count + 1, k, hits, visits + 1, entry_id)
+
+    def clear(self):
+        self.index.reset()
+        self.entries.clear()
+
+    def _add(self, centroid: np.ndarray, count: int, k: int, hits: Hits, visits: int, entry_id: Optional[int] = None):
+        if entry_id is None:
+            entry_id = self._next_id
+            self._next_id += 1
+        self.index.add_with_ids(centroid[None, :], np.array([entry_id], dtype=np.int64))
+        self.entries[entry_id] = [centroid, count, k, hits, visits]
+        if len(self.entries) > self.max_entries:
+            # Memory is bounded by cluster count; the least-visited older cluster goes first
+            self._remove(min(
+                (i for i in self.entries if i != entry_id),
+                key=lambda i: self.entries[i][4]
+            ))
+
+    def _remove(self, entry_id: int):
+        self.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        del self.entries[entry_id]
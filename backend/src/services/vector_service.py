@@ -1,90 +1,530 @@
+import asyncio
 import faiss
+import hashlib
+import logging
+import math
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import pickle
 import os
-from typing import List, Tuple, Dict
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from ..config.settings import get_settings
+from .embedding_service import embedding_service
+from .semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+COMPACT_BLOCK_ROWS = 65536
+# Written by the pickle-based store before vectors.f32 / ids.i64, keyed on the old chunk ids
+LEGACY_INDEX_FILES = ("faiss_index.bin", "chunk_metadata.pkl")
+VECTOR_INDEX_TYPES = ("hnsw_sq8", "hnsw", "hnsw_fp16", "ivf", "ivfpq", "pq", "sq8")
+
+class EmbeddingBatcher:
+    """
+    Background worker that pools texts from concurrent callers into shared encoder batches.
+    """
+    def __init__(self, encode: Callable[[List[str], int], np.ndarray], max_batch: int = 128, max_wait: float = 0.05):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self.queue = asyncio.Queue(maxsize=8 * self.max_batch)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if self._task is None:
+            return await asyncio.to_thread(self.encode, texts, self.max_batch)
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self.queue.put((text, future))
+            futures.append(future)
+        return np.stack(await asyncio.gather(*futures))
+
+    async def _drain(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._drain()
+            texts, futures = zip(*batch)
+            try:
+                # Off the event loop so requests keep being served while the encoder runs
+                embeddings = await asyncio.to_thread(self.encode, list(texts), self.max_batch)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future, embedding in zip(futures, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
 
 class VectorStore:
-    def __init__(self, dimension: int = 384, index_path: str = "vector_index"):
+    def __init__(self, dimension: int = 384, index_path: str = settings.VECTOR_DB_DIR):
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension) 
-        self.model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+        self.index_type = settings.VECTOR_INDEX_TYPE
+        if self.index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(
+                f"Unknown VECTOR_INDEX_TYPE {self.index_type!r}; expected one of {', '.join(VECTOR_INDEX_TYPES)}"
+            )
+        self.train_size = settings.VECTOR_TRAIN_SIZE
+        faiss.omp_set_num_threads(min(settings.FAISS_THREADS, os.cpu_count() or 1))
+        # Deleted ids stay in the index and raw store until compaction; searches mask them out
+        self.tombstones: Set[int] = set()
+        self._set_index(self._new_index())
         self.similarity_threshold = 0.5
-        self.chunk_ids = []
-        self.index_file = "faiss_index.bin"
-        self.metadata_file = "chunk_metadata.pkl"
-        
+        self.query_cache = SemanticCache(
+            dimension,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_SIZE
+        )
+        # sha256 digest of the query text -> embedding, so keys stay 32 bytes however long the query
+        self.query_embeddings: OrderedDict = OrderedDict()
+        self.query_embeddings_size = settings.QUERY_EMBED_CACHE_SIZE
+        self.batcher = EmbeddingBatcher(
+            self.encode_texts,
+            max_batch=settings.EMBED_BATCH_SIZE,
+            max_wait=settings.EMBED_BATCH_WAIT_MS / 1000
+        )
+        self.index_path = index_path
+        # Append-only raw stores: row i of vectors.f32 belongs to id i of ids.i64
+        self.vectors_file = os.path.join(index_path, "vectors.f32")
+        self.ids_file = os.path.join(index_path, "ids.i64")
+        # Snapshot of the built index, so startup only replays rows appended after it
+        self.checkpoint_file = os.path.join(index_path, "index.faiss")
+        # Append-only log of deleted ids, so a delete writes 8 bytes per chunk instead of the corpus
+        self.tombstones_file = os.path.join(index_path, "tombstones.i64")
+        self.checkpoint_every = settings.VECTOR_CHECKPOINT_EVERY
+        self.adds_since_checkpoint = 0
+        self.compact_ratio = settings.VECTOR_COMPACT_RATIO
+        self._compaction: Optional[asyncio.Task] = None
+        os.makedirs(index_path, exist_ok=True)
+
         self.load_index()
-    
-    def add_chunks(self, texts: List[Dict], chunk_ids: List[int]):
-        embeddings = []
-        for text in texts:
-            embedding = self.encode_text(text)
-            embeddings.append(embedding[0])
-        
-        if embeddings:
-            embeddings_array = np.array(embeddings)
-            self.index.add(embeddings_array)
-            self.chunk_ids.extend(chunk_ids)
-            self.save_index()
-
-    def delete_chunks(self, chunk_ids_to_delete: List[int]):
-        if not chunk_ids_to_delete:
-            return
-        
-        indices_to_keep = []
-        new_chunk_ids = []
-        
-        for i, chunk_id in enumerate(self.chunk_ids):
-            if chunk_id not in chunk_ids_to_delete:
-                indices_to_keep.append(i)
-                new_chunk_ids.append(chunk_id)
-        
-        if not indices_to_keep:
-            self.index = faiss.IndexFlatIP(self.dimension)
-            self.chunk_ids = []
+
+    def _new_index(self, train_vectors: np.ndarray = None):
+        # Exact search until there are enough vectors to train the ANN index on
+        if train_vectors is None or len(train_vectors) < self.train_size:
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+
+        sample_size = self.train_size
+        if self.index_type in ("ivf", "ivfpq"):
+            nlist = int(4 * math.sqrt(len(train_vectors)))
+            if self.index_type == "ivfpq":
+                # Coarse lists plus PQ codes scanned through per-query lookup tables
+                base = faiss.index_factory(
+                    self.dimension, f"IVF{nlist},PQ{settings.VECTOR_PQ_M}x8", faiss.METRIC_INNER_PRODUCT
+                )
+                sample_size = max(sample_size, 39 * 256)
+            else:
+                base = faiss.IndexIVFFlat(
+                    faiss.IndexFlatIP(self.dimension), self.dimension, nlist, faiss.METRIC_INNER_PRODUCT
+                )
+            sample_size = max(sample_size, 64 * nlist)
+        elif self.index_type == "pq":
+            # 384 float32 dims (1536 bytes) become settings.VECTOR_PQ_M one-byte codes
+            base = faiss.IndexPQ(self.dimension, settings.VECTOR_PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+            sample_size = max(sample_size, 39 * 256)
+        elif self.index_type == "sq8":
+            base = faiss.IndexScalarQuantizer(self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        elif self.index_type == "hnsw_fp16":
+            base = faiss.IndexHNSWSQ(
+                self.dimension, faiss.ScalarQuantizer.QT_fp16, 32, faiss.METRIC_INNER_PRODUCT
+            )
+        elif self.index_type == "hnsw":
+            # Full-precision graph; nothing to train, so the train() below is a no-op
+            base = faiss.IndexHNSWFlat(self.dimension, 32, faiss.METRIC_INNER_PRODUCT)
         else:
-            vectors_to_keep = []
-            for i in indices_to_keep:
-                vector = self.index.reconstruct(i)
-                vectors_to_keep.append(vector)
-            
-            self.index = faiss.IndexFlatIP(self.dimension)
-            if vectors_to_keep:
-                vectors_array = np.array(vectors_to_keep)
-                self.index.add(vectors_array)
-            
-            self.chunk_ids = new_chunk_ids
-        
-        self.save_index()
-    
+            # "hnsw_sq8"; anything else was rejected in __init__
+            base = faiss.IndexHNSWSQ(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT
+            )
+
+        if hasattr(base, "hnsw"):
+            base.hnsw.efConstruction = settings.VECTOR_HNSW_EF_CONSTRUCTION
+        self._apply_search_params(base)
+
+        step = max(1, len(train_vectors) // sample_size)
+        base.train(self._as_float32(train_vectors[::step]))
+        return faiss.IndexIDMap2(base)
+
+    @staticmethod
+    def _apply_search_params(base):
+        if hasattr(base, "hnsw"):
+            base.hnsw.efSearch = settings.VECTOR_HNSW_EF_SEARCH
+        if hasattr(base, "nprobe"):
+            base.nprobe = settings.VECTOR_IVF_NPROBE
+
+    def _set_index(self, index):
+        self.index = index
+        self.trained = not isinstance(faiss.downcast_index(index.index), faiss.IndexFlat)
+        self._refresh_search_params()
+
+    def _refresh_search_params(self):
+        self._search_params = None
+        self._search_selector = None
+        if not self.tombstones:
+            return
+
+        dead = np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))
+        batch = faiss.IDSelectorBatch(dead.size, faiss.swig_ptr(dead))
+        selector = faiss.IDSelectorNot(batch)
+        # SWIG does not keep the selector chain alive on its own
+        self._search_selector = (dead, batch, selector)
+        base = faiss.downcast_index(self.index.index)
+        if isinstance(base, faiss.IndexIVF):
+            self._search_params = faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+        elif isinstance(base, faiss.IndexHNSW):
+            self._search_params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+        elif not isinstance(base, faiss.IndexPQ):
+            self._search_params = faiss.SearchParameters(sel=selector)
+        # IndexPQ rejects selectors; search_embeddings over-fetches and filters for it instead
+
+    def _build_index(self, vectors: np.ndarray, ids: np.ndarray):
+        index = self._new_index(vectors)
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        return index
+
+    @staticmethod
+    def _as_float32(vectors: np.ndarray) -> np.ndarray:
+        # The raw store is written byte-for-byte as float32 rows, and FAISS would otherwise copy per call
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    @staticmethod
+    def _to_ids(chunk_pks: List[int]) -> np.ndarray:
+        # The chunk's surrogate primary key doubles as its FAISS id
+        return np.asarray(chunk_pks, dtype=np.int64)
+
+    def encode_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        # Shares the process-wide EmbeddingService model instead of loading a second copy
+        return embedding_service.get_embeddings(texts, batch_size)
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_texts([text])
+
+    @staticmethod
+    def _query_key(query: str) -> bytes:
+        return hashlib.sha256(query.encode("utf-8")).digest()
+
+    def _cache_query_embedding(self, key: bytes, embedding: np.ndarray) -> np.ndarray:
+        # Shared between callers through the cache, so keep it immutable
+        embedding.flags.writeable = False
+        self.query_embeddings[key] = embedding
+        if len(self.query_embeddings) > self.query_embeddings_size:
+            self.query_embeddings.popitem(last=False)
+        return embedding
+
+    def encode_query(self, query: str) -> np.ndarray:
+        key = self._query_key(query)
+        embedding = self.query_embeddings.get(key)
+        if embedding is not None:
+            self.query_embeddings.move_to_end(key)
+            return embedding
+
+        return self._cache_query_embedding(key, self.encode_text(query))
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        keys = [self._query_key(query) for query in queries]
+        rows: List[Optional[np.ndarray]] = []
+        misses = {}
+        for i, key in enumerate(keys):
+            embedding = self.query_embeddings.get(key)
+            if embedding is not None:
+                self.query_embeddings.move_to_end(key)
+            elif key not in misses:
+                misses[key] = i
+            rows.append(embedding)
+
+        if misses:
+            # Every uncached query goes through the encoder in a single pass
+            encoded = self.encode_texts([queries[i] for i in misses.values()], settings.EMBED_BATCH_SIZE)
+            fresh = {
+                key: self._cache_query_embedding(key, encoded[j:j + 1].copy())
+                for j, key in enumerate(misses)
+            }
+            rows = [fresh[key] if row is None else row for key, row in zip(keys, rows)]
+
+        return np.vstack(rows)
+
+    def add_chunks(self, texts: List[str], chunk_pks: List[int]):
+        if not texts:
+            return
+
+        # One encoder pass over every chunk of the upload
+        self.add_embeddings(self.encode_texts(texts, settings.EMBED_BATCH_SIZE), chunk_pks)
+
+    async def add_chunks_async(self, texts: List[str], chunk_pks: List[int]):
+        if not texts:
+            return
+
+        self.add_embeddings(await self.embed_texts_async(texts), chunk_pks)
+
+    async def embed_texts_async(self, texts: List[str]) -> np.ndarray:
+        return await self.batcher.embed(texts)
+
+    def add_embeddings(self, embeddings: np.ndarray, chunk_pks: List[int]):
+        self.add_embedding_batches([(embeddings, chunk_pks)])
+
+    def add_embedding_batches(self, batches: Iterable[Tuple[np.ndarray, List[int]]]):
+        # One upload streamed batch by batch; it still counts as a single add towards the next checkpoint
+        for embeddings, chunk_pks in batches:
+            embeddings = self._as_float32(embeddings)
+            ids = self._to_ids(chunk_pks)
+            self.save_index(embeddings, ids)
+            if not self.trained and self.index.ntotal + len(ids) >= self.train_size:
+                self._set_index(self._build_index(*self._read_store()))
+                self.checkpoint()
+            else:
+                self.index.add_with_ids(embeddings, ids)
+        self.query_cache.clear()
+
+        self.adds_since_checkpoint += 1
+        if self.adds_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def delete_chunks(self, chunk_pks_to_delete: List[int]):
+        new_ids = {int(chunk_pk) for chunk_pk in chunk_pks_to_delete} - self.tombstones
+        if not new_ids:
+            return
+
+        # Tombstoned rather than removed: HNSW graphs cannot drop nodes, and rewriting the store
+        # or rebuilding the index here would make every delete O(N)
+        ids = self._to_ids(sorted(new_ids))
+        with open(self.tombstones_file, 'ab') as f:
+            ids.tofile(f)
+        self.tombstones.update(new_ids)
+        self._refresh_search_params()
+        self.query_cache.clear()
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self.tombstones) < max(1.0, self.compact_ratio * self.index.ntotal):
+            return
+        if self._compaction is not None and not self._compaction.done():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to keep responsive (scripts, tests): compact inline
+            self.compact()
+            return
+        self._compaction = loop.create_task(self._compact_in_background(*self._compaction_snapshot()))
+
+    def _compaction_snapshot(self) -> Tuple[int, frozenset]:
+        return len(self._read_store()[1]), frozenset(self.tombstones)
+
+    def compact(self):
+        count, tombstones = self._compaction_snapshot()
+        self._swap_compacted(count, tombstones, self._build_compacted(count, tombstones))
+
+    async def _compact_in_background(self, count: int, tombstones: frozenset):
+        # The copy and the (re)train run off the loop; adds and deletes made meanwhile only
+        # touch the live store and are carried over by the swap below
+        index = await asyncio.to_thread(self._build_compacted, count, tombstones)
+        self._swap_compacted(count, tombstones, index)
+
+    async def wait_for_compaction(self):
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+
+    def _build_compacted(self, count: int, tombstones: frozenset):
+        vectors, ids = self._read_store()
+        dead = np.fromiter(tombstones, dtype=np.int64, count=len(tombstones))
+        with open(self.vectors_file + ".compact", 'wb') as vectors_out, open(self.ids_file + ".compact", 'wb') as ids_out:
+            for start in range(0, count, COMPACT_BLOCK_ROWS):
+                stop = min(start + COMPACT_BLOCK_ROWS, count)
+                block_ids = ids[start:stop]
+                keep = ~np.isin(block_ids, dead)
+                np.ascontiguousarray(vectors[start:stop][keep]).tofile(vectors_out)
+                np.ascontiguousarray(block_ids[keep]).tofile(ids_out)
+        del vectors, ids
+
+        kept = os.path.getsize(self.ids_file + ".compact") // 8
+        if not kept:
+            return self._new_index()
+        kept_vectors = np.memmap(self.vectors_file + ".compact", dtype=np.float32, mode='r', shape=(kept, self.dimension))
+        kept_ids = np.memmap(self.ids_file + ".compact", dtype=np.int64, mode='r', shape=(kept,))
+        return self._build_index(kept_vectors, kept_ids)
+
+    def _swap_compacted(self, count: int, tombstones: frozenset, index):
+        vectors, ids = self._read_store()
+        tail_vectors, tail_ids = np.array(vectors[count:]), np.array(ids[count:])
+        del vectors, ids
+        for path, tail in ((self.vectors_file, tail_vectors), (self.ids_file, tail_ids)):
+            with open(path + ".compact", 'ab') as f:
+                tail.tofile(f)
+            os.replace(path + ".compact", path)
+        if len(tail_ids):
+            index.add_with_ids(tail_vectors, tail_ids)
+
+        # Ids deleted while the compaction ran are still in the new store, so they stay tombstoned
+        self.tombstones = self.tombstones - tombstones
+        with open(self.tombstones_file + ".tmp", 'wb') as f:
+            self._to_ids(sorted(self.tombstones)).tofile(f)
+        os.replace(self.tombstones_file + ".tmp", self.tombstones_file)
+        self._set_index(index)
+        self.query_cache.clear()
+        self.checkpoint()
+
     def search(self, query: str, threshold: float = 0.5, k: int = 5) -> List[Tuple[int, float]]:
         if self.index.ntotal == 0:
             return []
-        
-        query_embedding = self.encode_text(query)
-        scores, indices = self.index.search(query_embedding, k)
-        
-        results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if score >= threshold:  
-                chunk_id = self.chunk_ids[idx]
-                results.append((chunk_id, float(score)))
-        return results
-    
-    def save_index(self):
-        faiss.write_index(self.index, self.index_file)
-        with open(self.metadata_file, 'wb') as f:
-            pickle.dump(self.chunk_ids, f)
-    
+        return self.search_embedding(self.encode_query(query), threshold, k)
+
+    def search_embedding(self, query_embedding: np.ndarray, threshold: float = 0.5, k: int = 5) -> List[Tuple[int, float]]:
+        return self.search_embeddings(query_embedding, threshold, k)[0]
+
+    def batch_search(self, queries: List[str], threshold: float = 0.5, k: int = 5) -> List[List[Tuple[int, float]]]:
+        if not queries:
+            return []
+        if self.index.ntotal == 0:
+            return [[] for _ in queries]
+        return self.search_embeddings(self.encode_queries(queries), threshold, k)
+
+    def search_embeddings(self, query_embeddings: np.ndarray, threshold: float = 0.5, k: int = 5) -> List[List[Tuple[int, float]]]:
+        if self.index.ntotal == 0:
+            return [[] for _ in range(len(query_embeddings))]
+
+        query_embeddings = self._as_float32(query_embeddings)
+        results = [self.query_cache.get(query_embeddings[i:i + 1], k) for i in range(len(query_embeddings))]
+        misses = [i for i, hits in enumerate(results) if hits is None]
+        if misses:
+            # All cache misses go to FAISS as one (n, d) matrix, i.e. one GEMM instead of n
+            miss_embeddings = query_embeddings[misses]
+            fetch_k = k
+            if self.tombstones and self._search_params is None:
+                # No selector support: fetch past every tombstone so k live hits survive the filter
+                fetch_k = k + len(self.tombstones)
+            scores, indices = self.index.search(miss_embeddings, fetch_k, params=self._search_params)
+            for row, i in enumerate(misses):
+                hits = [
+                    (int(idx), float(score))
+                    for score, idx in zip(scores[row], indices[row])
+                    if idx != -1 and int(idx) not in self.tombstones
+                ][:k]
+                self.query_cache.put(miss_embeddings[row:row + 1], k, hits)
+                results[i] = hits
+
+        return [[(key, score) for key, score in hits if score >= threshold] for hits in results]
+
+    def _read_store(self) -> Tuple[np.ndarray, np.ndarray]:
+        row_bytes = self.dimension * 4
+        n_vectors = os.path.getsize(self.vectors_file) // row_bytes if os.path.exists(self.vectors_file) else 0
+        n_ids = os.path.getsize(self.ids_file) // 8 if os.path.exists(self.ids_file) else 0
+        count = min(n_vectors, n_ids)
+        if count == 0:
+            return np.empty((0, self.dimension), dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        vectors = np.memmap(self.vectors_file, dtype=np.float32, mode='r', shape=(count, self.dimension))
+        ids = np.memmap(self.ids_file, dtype=np.int64, mode='r', shape=(count,))
+        return vectors, ids
+
+    def save_index(self, vectors: np.ndarray, ids: np.ndarray):
+        # Only the new rows hit the disk; the index snapshot is refreshed every checkpoint_every uploads
+        with open(self.vectors_file, 'ab') as f:
+            vectors.tofile(f)
+        with open(self.ids_file, 'ab') as f:
+            ids.tofile(f)
+
+    def checkpoint(self):
+        tmp_path = self.checkpoint_file + ".tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self.checkpoint_file)
+        self.adds_since_checkpoint = 0
+
+    def _load_checkpoint(self, ids: np.ndarray):
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            index = faiss.read_index(self.checkpoint_file)
+        except RuntimeError:
+            return None
+
+        # Valid only if its ids are exactly a prefix of the store, i.e. nothing was deleted since
+        snapshot_ids = faiss.vector_to_array(index.id_map)
+        if len(snapshot_ids) > len(ids) or not np.array_equal(snapshot_ids, ids[:len(snapshot_ids)]):
+            return None
+
+        self._apply_search_params(faiss.downcast_index(index.index))
+        return index
+
+    def _check_legacy_files(self):
+        # The old store wrote to the working directory; finding it means this vector store starts empty
+        legacy = [
+            path
+            for directory in dict.fromkeys((self.index_path, os.getcwd()))
+            for path in (os.path.join(directory, name) for name in LEGACY_INDEX_FILES)
+            if os.path.exists(path)
+        ]
+        if legacy:
+            raise RuntimeError(
+                f"Found a vector index from an older release ({', '.join(legacy)}). Its ids do not match "
+                "chunk_pk; re-upload the documents into a fresh database and delete these files"
+            )
+
     def load_index(self):
-        if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
-            self.index = faiss.read_index(self.index_file)
-            with open(self.metadata_file, 'rb') as f:
-                self.chunk_ids = pickle.load(f)
+        self._check_legacy_files()
+        if os.path.exists(self.ids_file + ".compact") and not os.path.exists(self.vectors_file + ".compact"):
+            # Interrupted between the two renames of a compaction swap, so finish it
+            os.replace(self.ids_file + ".compact", self.ids_file)
+        for path in (self.vectors_file + ".compact", self.ids_file + ".compact"):
+            if os.path.exists(path):
+                os.remove(path)
 
-vector_store = VectorStore()
+        vectors, ids = self._read_store()
+        count = len(ids)
+        # Drop any torn tail left by an interrupted append so both files stay row-aligned
+        for path, row_bytes in ((self.vectors_file, self.dimension * 4), (self.ids_file, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != count * row_bytes:
+                os.truncate(path, count * row_bytes)
 
+        if os.path.exists(self.tombstones_file):
+            # Same torn-tail repair as the store files
+            dead_count = os.path.getsize(self.tombstones_file) // 8
+            os.truncate(self.tombstones_file, dead_count * 8)
+            self.tombstones = set(np.fromfile(self.tombstones_file, dtype=np.int64, count=dead_count).tolist())
+
+        index = self._load_checkpoint(ids)
+        if index is None:
+            self._set_index(self._build_index(vectors, ids))
+            return
+
+        covered = index.ntotal
+        if covered < count:
+            index.add_with_ids(np.ascontiguousarray(vectors[covered:]), np.ascontiguousarray(ids[covered:]))
+        self._set_index(index)
+        if not self.trained and self.index.ntotal >= self.train_size:
+            self._set_index(self._build_index(vectors, ids))
+
+vector_store = VectorStore()
 
-print("Vector store initialized successfully")
\ No newline at end of file
+logger.info("Vector store initialized successfully")
\ No newline at end of file
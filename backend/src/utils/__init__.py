@@ -4,18 +4,21 @@ from .auth import (
     verify_password_with_salt, 
     get_password_hash, 
     verify_password, 
-    get_password_hash, 
-    verify_password, 
+    get_password_hash_async, 
+    verify_password_async, 
+    password_hmac, 
+    password_hmac_is_current, 
+    verify_user_password, 
     get_user, 
     get_user_by_email, 
     authenticate_user, 
     verify_token, 
     create_access_token, 
     get_current_user, 
+    invalidate_cached_user, 
     create_user, 
     update_user_password, 
     validate_password_strength )
-from ..utils.text_process import extract_text_from_pdf, chunk_text
 from .exceptions import (
     RAGException,
     AuthenticationError,
@@ -24,28 +27,52 @@ from .exceptions import (
     ValidationError
 )
 
+# text_process pulls in PyMuPDF, so it is only imported once one of its names is used (PEP 562)
+_TEXT_PROCESS_EXPORTS = (
+    "extract_text_from_pdf",
+    "iter_pdf_pages",
+    "chunk_text",
+    "iter_chunks",
+    "dedupe_chunks",
+    "iter_unique_chunks",
+)
+
+def __getattr__(name):
+    if name in _TEXT_PROCESS_EXPORTS:
+        from . import text_process
+        return getattr(text_process, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
-    generate_salt, 
-    hash_password_with_salt, 
-    verify_password_with_salt, 
-    get_password_hash, 
-    verify_password, 
-    get_password_hash, 
-    verify_password, 
-    get_user, 
-    get_user_by_email, 
-    authenticate_user, 
-    verify_token, 
-    create_access_token, 
-    get_current_user, 
-    create_user, 
-    update_user_password, 
-    validate_password_strength,
-    extract_text_from_pdf, 
-    chunk_text,
-    RAGException,
-    AuthenticationError,
-    DocumentProcessingError,
-    VectorSearchError,
-    ValidationError
-    ]
\ No newline at end of file
+    "generate_salt",
+    "hash_password_with_salt",
+    "verify_password_with_salt",
+    "get_password_hash",
+    "verify_password",
+    "get_password_hash_async",
+    "verify_password_async",
+    "password_hmac",
+    "password_hmac_is_current",
+    "verify_user_password",
+    "get_user",
+    "get_user_by_email",
+    "authenticate_user",
+    "verify_token",
+    "create_access_token",
+    "get_current_user",
+    "invalidate_cached_user",
+    "create_user",
+    "update_user_password",
+    "validate_password_strength",
+    "extract_text_from_pdf",
+    "iter_pdf_pages",
+    "chunk_text",
+    "iter_chunks",
+    "dedupe_chunks",
+    "iter_unique_chunks",
+    "RAGException",
+    "AuthenticationError",
+    "DocumentProcessingError",
+    "VectorSearchError",
+    "ValidationError",
+]
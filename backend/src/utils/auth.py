@@ -1,22 +1,45 @@
 # backend/app/auth.py
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Dict, Any, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from backend.src.schema.users import User
 from backend.src.config.database import get_db
 from .exceptions import AuthenticationError
+import asyncio
 import os
 import secrets
 import hashlib
+import hmac
+import re
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Dedicated pepper for the fast pre-check, never stored in the database. When it is unset
+# the pre-check is off and passwords go through bcrypt alone: an HMAC keyed with a
+# guessable default would let a dumped users table be brute-forced at HMAC speed
+PASSWORD_HMAC_KEY = os.getenv("PASSWORD_HMAC_KEY", "").encode() or None
+# Prefixed onto every stored HMAC so one made under a rotated key is recognised as stale
+# rather than read as a wrong password
+PASSWORD_HMAC_KEY_ID = hashlib.sha256(PASSWORD_HMAC_KEY).digest()[:4] if PASSWORD_HMAC_KEY else None
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+_DIGIT_RE = re.compile(r"\d")
+_UPPER_RE = re.compile(r"[A-Z]")
+_LOWER_RE = re.compile(r"[a-z]")
+_SPECIAL_RE = re.compile(r"[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -35,6 +58,19 @@ def verify_password_with_salt(plain_password: str, salt: str, hashed_password: s
     salted_password = f"{plain_password}{salt}"
     return pwd_context.verify(salted_password, hashed_password)
 
+def password_hmac(password: str, salt: str) -> Optional[bytes]:
+    """
+    Key id plus keyed HMAC-SHA256 of the salted password, checked before bcrypt.
+    Returns None when no PASSWORD_HMAC_KEY is configured.
+    """
+    if PASSWORD_HMAC_KEY is None:
+        return None
+    return PASSWORD_HMAC_KEY_ID + hmac.new(PASSWORD_HMAC_KEY, f"{password}{salt}".encode(), hashlib.sha256).digest()
+
+def password_hmac_is_current(stored_hmac: Optional[bytes]) -> bool:
+    """Whether a stored HMAC was made with the configured key."""
+    return PASSWORD_HMAC_KEY is not None and stored_hmac is not None and stored_hmac[:4] == PASSWORD_HMAC_KEY_ID
+
 def get_password_hash(password: str) -> tuple[str, str]:
     """
     Generate password hash with salt.
@@ -48,21 +84,50 @@ def verify_password(plain_password: str, hashed_password: str, salt: str) -> boo
     """Verify password using salt."""
     return verify_password_with_salt(plain_password, salt, hashed_password)
 
-def get_user(db: Session, username: str):
+async def get_password_hash_async(password: str) -> tuple[str, str]:
+    """Generate password hash with salt on a worker thread, off the event loop."""
+    return await asyncio.to_thread(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str, salt: str) -> bool:
+    """Verify password using salt on a worker thread, off the event loop."""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password, salt)
+
+async def verify_user_password(user: User, plain_password: str) -> bool:
+    """Verify a user's password, rejecting HMAC mismatches before paying for bcrypt."""
+    if password_hmac_is_current(user.user_pw_hmac) and not hmac.compare_digest(
+        password_hmac(plain_password, user.salt), user.user_pw_hmac
+    ):
+        return False
+    # No key configured, no stored HMAC, or one from a rotated key: bcrypt alone decides
+    return await verify_password_async(plain_password, user.user_password, user.salt)
+
+async def get_user(db: AsyncSession, username: str):
     """Get user by username."""
-    return db.query(User).filter(User.user_name == username).first()
+    result = await db.execute(select(User).where(User.user_name == username))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: AsyncSession, email: str):
     """Get user by email."""
-    return db.query(User).filter(User.user_email == email).first()
+    result = await db.execute(select(User).where(User.user_email == email))
+    return result.scalars().first()
 
-def authenticate_user(db: Session, username: str, password: str):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
     """Authenticate user with username and password."""
-    user = get_user(db, username)
+    user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.user_password, user.salt):
+    if not await verify_user_password(user, password):
         return False
+    if PASSWORD_HMAC_KEY is not None and not password_hmac_is_current(user.user_pw_hmac):
+        # Legacy rows and ones stamped under a previous key are re-stamped on their next good login
+        try:
+            user.user_pw_hmac = password_hmac(password, user.salt)
+            await db.commit()
+        except Exception:
+            # The login itself succeeded; reload the row the rollback expired and carry on
+            await db.rollback()
+            await db.refresh(user)
+        invalidate_cached_user(username)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -85,7 +150,39 @@ def verify_token(token: str) -> Dict[str, Any]:
     except jwt.JWTError:
         raise AuthenticationError("Invalid token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# username -> (expires_at, read-only snapshot of the user's columns). No ORM instance is
+# cached, so a request mutating or rolling back its own User cannot leak into the cache;
+# a short TTL bounds how stale a snapshot can get
+_user_cache: "OrderedDict[str, Tuple[float, Mapping[str, Any]]]" = OrderedDict()
+
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> Tuple[Optional[str], Optional[float]]:
+    """Verify the token signature once per distinct token; returns (subject, exp)."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return payload.get("sub"), payload.get("exp")
+
+def _get_cached_user(username: str) -> Optional[Mapping[str, Any]]:
+    entry = _user_cache.get(username)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _user_cache[username]
+        return None
+    _user_cache.move_to_end(username)
+    return entry[1]
+
+def _cache_user(user: User):
+    snapshot = MappingProxyType({attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    _user_cache[user.user_name] = (time.monotonic() + USER_CACHE_TTL_SECONDS, snapshot)
+    _user_cache.move_to_end(user.user_name)
+    if len(_user_cache) > USER_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+
+def invalidate_cached_user(username: str):
+    """Drop a user from the auth cache after their row changes."""
+    _user_cache.pop(username, None)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """Get current user from JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,41 +190,57 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        username, expire = _decode_token(token)
     except JWTError:
         raise credentials_exception
-    user = get_user(db, username=username)
+    # The decode is memoised, so expiry has to be re-checked against the clock on every call
+    if username is None or (expire is not None and expire < time.time()):
+        raise credentials_exception
+
+    snapshot = _get_cached_user(username)
+    if snapshot is not None:
+        # A fresh instance built from the snapshot is attached to this request's session
+        # without a SELECT, so refresh/commit still work on it
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    user = await get_user(db, username=username)
     if user is None:
         raise credentials_exception
+    _cache_user(user)
     return user
 
-def create_user(db: Session, username: str, email: str, password: str) -> User:
+async def create_user(db: AsyncSession, username: str, email: str, password: str) -> User:
     """Create a new user with salted password."""
-    hashed_password, salt = get_password_hash(password)
+    hashed_password, salt = await get_password_hash_async(password)
     db_user = User(
         user_name=username,
         user_email=email,
         user_password=hashed_password,
-        salt=salt
+        salt=salt,
+        user_pw_hmac=password_hmac(password, salt)
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user_password(db: Session, user: User, new_password: str) -> bool:
+async def update_user_password(db: AsyncSession, user: User, new_password: str) -> bool:
     """Update user password with new salt."""
+    # Read before the try: a rollback expires the instance and async sessions cannot lazy-load it
+    username = user.user_name
     try:
-        hashed_password, salt = get_password_hash(new_password)
+        hashed_password, salt = await get_password_hash_async(new_password)
         user.user_password = hashed_password
         user.salt = salt
-        db.commit()
+        user.user_pw_hmac = password_hmac(new_password, salt)
+        await db.commit()
+        invalidate_cached_user(username)
         return True
     except Exception:
-        db.rollback()
+        await db.rollback()
+        invalidate_cached_user(username)
         return False
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
@@ -138,16 +251,18 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not any(c.isupper() for c in password):
+    # The precompiled ASCII classes settle most passwords in C; only non-ASCII ones fall back
+    # to str.isupper()/islower() per character, which decide caseless and titlecase letters
+    if not _UPPER_RE.search(password) and (password.isascii() or not any(c.isupper() for c in password)):
         return False, "Password must contain at least one uppercase letter"
     
-    if not any(c.islower() for c in password):
+    if not _LOWER_RE.search(password) and (password.isascii() or not any(c.islower() for c in password)):
         return False, "Password must contain at least one lowercase letter"
     
-    if not any(c.isdigit() for c in password):
+    if not _DIGIT_RE.search(password):
         return False, "Password must contain at least one digit"
     
-    if not any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
+    if not _SPECIAL_RE.search(password):
         return False, "Password must contain at least one special character"
     
     return True, "Password is valid"
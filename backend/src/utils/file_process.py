@@ -0,0 +1,60 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterator, Tuple
+from fastapi import UploadFile
+from .exceptions import FileProcessingError
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+@asynccontextmanager
+async def spool_upload_to_disk(file: UploadFile, max_size: int, suffix: str = "") -> AsyncIterator[Tuple[str, int, str]]:
+    """
+    Stream an upload into a temporary file one block at a time.
+    Yields tuple of (path, size, sha256 hex digest); the file is removed on exit.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        size = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as tmp:
+            while block := await file.read(COPY_BLOCK_SIZE):
+                size += len(block)
+                if size > max_size:
+                    raise FileProcessingError(f"File too large. Maximum size is {max_size // (1024*1024)}MB")
+                digest.update(block)
+                tmp.write(block)
+        yield path, size, digest.hexdigest()
+    finally:
+        os.remove(path)
+
+
+class BatchSpool:
+    """
+    Temporary file of batches, read back in the order they were appended.
+    Keeps a single batch in memory at a time; it only ever reads back what this process wrote.
+    """
+    def __init__(self):
+        self._file = None
+        self.batches = 0
+
+    def append(self, batch: Any):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()
+        self._file.seek(0, os.SEEK_END)
+        pickle.dump(batch, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.batches += 1
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._file is None:
+            return
+        self._file.seek(0)
+        for _ in range(self.batches):
+            yield pickle.load(self._file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
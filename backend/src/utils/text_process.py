@@ -1,35 +1,101 @@
 import fitz 
-from typing import List
+import numpy as np
+import zlib
+from typing import Dict, Iterable, Iterator, List, Tuple
 import io
 import logging
 
-def extract_text_from_pdf(file_content: bytes) -> str:
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+_MINHASH_PRIME = np.uint64((1 << 61) - 1)
+# a, b < 2**29 and crc32 < 2**32 keep a*x + b below 2**62, so uint64 never wraps
+_minhash_rng = np.random.RandomState(1)
+_MINHASH_A = _minhash_rng.randint(1, 1 << 29, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+_MINHASH_B = _minhash_rng.randint(0, 1 << 29, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
     logger = logging.getLogger(__name__)
     try:
-        text = ""
-        with fitz.open(stream=file_content, filetype="pdf") as doc:
+        flags = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE
+        with fitz.open(pdf_path, filetype="pdf") as doc:
             logger.info(f"PDF opened successfully. Number of pages: {doc.page_count}")
-            for i, page in enumerate(doc):
-                page_text = page.get_text()
-                logger.info(f"Page {i+1}: Extracted {len(page_text)} characters.")
+            for page in doc:
+                page_text = page.get_text("text", flags=flags, sort=False)
                 if page_text:
-                    text += page_text + "\n"
-        logger.info(f"Total extracted text length: {len(text)}")
-        return text
+                    yield page_text
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise ValueError(f"Error extracting text from PDF: {str(e)}")
 
+def extract_text_from_pdf(pdf_path: str) -> str:
+    text = "\n".join(iter_pdf_pages(pdf_path))
+    logging.getLogger(__name__).info(f"Total extracted text length: {len(text)}")
+    return text
+
+def iter_chunks(parts: Iterable[str], chunk_size: int = 1000, overlap: int = 200, separator: str = "\n") -> Iterator[str]:
+    """
+    Yield the same windows chunk_text would produce over separator.join(parts),
+    holding only the unfinished window in memory.
+    """
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("Chunk overlap must be smaller than chunk size")
+
+    buffer, start = "", 0
+    for i, part in enumerate(parts):
+        # The consumed prefix is trimmed once per part; windows only move an offset
+        buffer = buffer[start:] + (separator + part if i else part)
+        start = 0
+        while len(buffer) - start >= chunk_size:
+            yield buffer[start:start + chunk_size]
+            start += step
+    for start in range(start, len(buffer), step):
+        yield buffer[start:start + chunk_size]
+
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - overlap
-        if start >= len(text):
-            break
-    return chunks
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("Chunk overlap must be smaller than chunk size")
+    return [text[start:start + chunk_size] for start in range(0, len(text), step)]
+
+def minhash_signature(text: str, shingle_size: int = 3) -> np.ndarray:
+    words = text.lower().split()
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(hashes, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+
+def iter_unique_chunks(chunks: Iterable[str], threshold: float = 0.9) -> Iterator[Tuple[int, str, np.ndarray]]:
+    """
+    Yield (position, chunk, minhash_signature) for each chunk whose estimated Jaccard
+    similarity to every earlier kept chunk is at most threshold. position is the
+    chunk's index in the input, so gaps mark the near-duplicates that were dropped.
+    """
+    rows_per_band = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    signatures: List[np.ndarray] = []
+
+    for position, chunk in enumerate(chunks):
+        signature = minhash_signature(chunk)
+        bands = [
+            (band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+            for band in range(MINHASH_BANDS)
+        ]
+        # Only chunks sharing at least one band bucket are compared
+        candidates = {i for key in bands for i in buckets.get(key, ())}
+        if any(np.mean(signatures[i] == signature) > threshold for i in candidates):
+            continue
+
+        for key in bands:
+            buckets.setdefault(key, []).append(len(signatures))
+        signatures.append(signature)
+        yield position, chunk, signature
+
+def dedupe_chunks(chunks: List[str], threshold: float = 0.9) -> Tuple[List[str], List[np.ndarray]]:
+    """
+    Drop chunks whose estimated Jaccard similarity to an earlier chunk exceeds threshold.
+    Returns tuple of (kept_chunks, minhash_signatures).
+    """
+    kept = list(iter_unique_chunks(chunks, threshold))
+    return [chunk for _, chunk, _ in kept], [signature for _, _, signature in kept]
 
 print("Text extraction and chunking utilities loaded successfully")
\ No newline at end of file
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The modules import as backend.src.*, and read DATABASE_URL / VECTOR_DB_DIR at import
+# time, so both are pointed at a scratch directory before any test module loads them
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+_scratch = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("VECTOR_DB_DIR", os.path.join(_scratch, "vector_db"))
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+
+import pytest
+from sqlalchemy import delete
+
+from backend.src.config.database import SessionLocal, engine, init_db
+from backend.src.schema import users
+# Imported only so their tables are on Base.metadata when init_db runs create_all
+from backend.src.schema import chunks, documents, question_logs  # noqa: F401
+from backend.src.schema.models.users_model import UserCreate
+from backend.src.utils import auth
+
+PASSWORD = "Passw0rd!"
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    # bcrypt itself is passlib's concern; a reversible stand-in keeps these tests fast
+    calls = []
+
+    def verify(secret, hashed):
+        calls.append(secret)
+        return hashed == f"hashed:{secret}"
+
+    monkeypatch.setattr(auth.pwd_context, "hash", lambda secret: f"hashed:{secret}")
+    monkeypatch.setattr(auth.pwd_context, "verify", verify)
+    monkeypatch.setattr(auth, "_user_cache", type(auth._user_cache)())
+    return calls
+
+
+def _set_hmac_key(monkeypatch, key):
+    encoded = key.encode() if key else None
+    monkeypatch.setattr(auth, "PASSWORD_HMAC_KEY", encoded)
+    monkeypatch.setattr(auth, "PASSWORD_HMAC_KEY_ID", hashlib.sha256(encoded).digest()[:4] if key else None)
+
+
+def _run(body):
+    async def main():
+        await init_db()
+        try:
+            async with SessionLocal() as db:
+                await db.execute(delete(users.User))
+                await db.commit()
+            await body()
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def test_without_hmac_key_only_bcrypt_is_used(monkeypatch, fast_hashing):
+    _set_hmac_key(monkeypatch, None)
+
+    async def body():
+        async with SessionLocal() as db:
+            user = await auth.create_user(db, "alice", "alice@example.com", PASSWORD)
+            assert user.user_pw_hmac is None
+            assert await auth.authenticate_user(db, "alice", "wrong") is False
+            assert await auth.authenticate_user(db, "alice", PASSWORD)
+        assert len(fast_hashing) == 2
+
+    _run(body)
+
+
+def test_wrong_password_is_rejected_before_bcrypt(monkeypatch, fast_hashing):
+    _set_hmac_key(monkeypatch, "pepper-1")
+
+    async def body():
+        async with SessionLocal() as db:
+            user = await auth.create_user(db, "bob", "bob@example.com", PASSWORD)
+            assert auth.password_hmac_is_current(user.user_pw_hmac)
+            assert await auth.authenticate_user(db, "bob", "wrong") is False
+            assert fast_hashing == []
+            assert await auth.authenticate_user(db, "bob", PASSWORD)
+            assert len(fast_hashing) == 1
+
+    _run(body)
+
+
+def test_rotated_hmac_key_falls_back_to_bcrypt_and_restamps(monkeypatch):
+    _set_hmac_key(monkeypatch, "pepper-1")
+
+    async def body():
+        async with SessionLocal() as db:
+            await auth.create_user(db, "carol", "carol@example.com", PASSWORD)
+
+        _set_hmac_key(monkeypatch, "pepper-2")
+        async with SessionLocal() as db:
+            user = await auth.authenticate_user(db, "carol", PASSWORD)
+            assert user
+            assert auth.password_hmac_is_current(user.user_pw_hmac)
+        async with SessionLocal() as db:
+            assert await auth.authenticate_user(db, "carol", "wrong") is False
+
+    _run(body)
+
+
+def test_cached_user_is_a_fresh_instance_unaffected_by_rollback(monkeypatch):
+    _set_hmac_key(monkeypatch, None)
+
+    async def body():
+        async with SessionLocal() as db:
+            await auth.create_user(db, "dave", "dave@example.com", PASSWORD)
+        token = auth.create_access_token({"sub": "dave"})
+
+        async with SessionLocal() as db:
+            live = await auth.get_current_user(token, db)
+            live.user_email = "dirty@example.com"
+            await db.rollback()
+
+        async with SessionLocal() as db:
+            cached = await auth.get_current_user(token, db)
+            assert cached is not live
+            assert cached in db
+            assert cached.user_email == "dave@example.com"
+            await db.refresh(cached)
+            assert await auth.update_user_password(db, cached, "N3wPassw0rd!")
+            assert "dave" not in auth._user_cache
+
+        async with SessionLocal() as db:
+            user = await auth.get_current_user(token, db)
+            assert await auth.verify_user_password(user, "N3wPassw0rd!")
+
+    _run(body)
+
+
+def test_expired_token_is_rejected():
+    from datetime import timedelta
+    from fastapi import HTTPException
+
+    async def body():
+        token = auth.create_access_token({"sub": "nobody"}, timedelta(seconds=-1))
+        async with SessionLocal() as db:
+            with pytest.raises(HTTPException) as error:
+                await auth.get_current_user(token, db)
+        assert error.value.status_code == 401
+
+    _run(body)
+
+
+@pytest.mark.parametrize("password,expected", [
+    ("Passw0rd!", (True, "Password is valid")),
+    ("Éclair1!", (True, "Password is valid")),
+    ("éCLAIR1!", (True, "Password is valid")),
+    ("ÉCLAIR1!", (False, "Password must contain at least one lowercase letter")),
+    ("éclair1!", (False, "Password must contain at least one uppercase letter")),
+    # ß is lowercase with no single-character uppercase; ǅ is titlecase, so neither upper nor lower
+    ("ßßßßßß1!", (False, "Password must contain at least one uppercase letter")),
+    ("ǅǅǅǅǅǅ1!", (False, "Password must contain at least one uppercase letter")),
+    ("Ǆǅǅǅǅǅ1!", (False, "Password must contain at least one lowercase letter")),
+    ("passw0rd!", (False, "Password must contain at least one uppercase letter")),
+])
+def test_password_case_checks_use_unicode_case(password, expected):
+    assert auth.validate_password_strength(password) == expected
+
+
+def test_user_create_password_case_checks_use_unicode_case():
+    UserCreate(username="erin", email="erin@example.com", password="Éclairé12")
+    with pytest.raises(ValueError):
+        UserCreate(username="erin", email="erin@example.com", password="ßßßßßß12")
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.src.config.database import Base, _check_schema
+# Imported only so their tables are on Base.metadata for create_all
+from backend.src.schema import chunks, documents, question_logs, users  # noqa: F401
+
+
+def _engine_with(ddl):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in ddl:
+            conn.execute(text(statement))
+    return engine
+
+
+def test_current_schema_passes():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        _check_schema(conn)
+
+
+def test_chunks_table_without_chunk_pk_is_rejected():
+    engine = _engine_with([
+        "CREATE TABLE chunks (chunk_id INTEGER, doc_id INTEGER, chunk_content TEXT, PRIMARY KEY (chunk_id, doc_id))"
+    ])
+    with engine.begin() as conn, pytest.raises(RuntimeError, match="chunk_pk"):
+        _check_schema(conn)
+
+
+def test_chunks_table_without_autoincrement_is_rejected():
+    engine = _engine_with(["CREATE TABLE chunks (chunk_pk INTEGER PRIMARY KEY, chunk_content TEXT)"])
+    with engine.begin() as conn, pytest.raises(RuntimeError, match="AUTOINCREMENT"):
+        _check_schema(conn)
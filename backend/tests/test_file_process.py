@@ -0,0 +1,20 @@
+import numpy as np
+
+from backend.src.utils.file_process import BatchSpool
+
+
+def test_batch_spool_reads_batches_back_in_order():
+    spool = BatchSpool()
+    assert list(spool) == []
+    batches = [([(0, "alpha", np.arange(4, dtype=np.uint64))], np.ones((1, 3), dtype=np.float32)), ([], None)]
+    for batch in batches:
+        spool.append(batch)
+
+    for _ in range(2):
+        (chunks, embeddings), empty = spool
+        assert chunks[0][:2] == (0, "alpha")
+        assert np.array_equal(chunks[0][2], batches[0][0][0][2])
+        assert np.array_equal(embeddings, batches[0][1])
+        assert empty == ([], None)
+    spool.close()
+    assert list(spool) == []
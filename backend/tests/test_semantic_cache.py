@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from backend.src.services.semantic_cache import SemanticCache
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return (vector / np.linalg.norm(vector))[None, :]
+
+
+def test_empty_cache_misses():
+    cache = SemanticCache(4)
+    assert cache.get(_unit([1, 0, 0, 0]), 5) is None
+
+
+def test_similar_query_hits_and_distant_query_misses():
+    cache = SemanticCache(4, threshold=0.9)
+    hits = [(10, 0.8), (11, 0.7)]
+    cache.put(_unit([1, 0, 0, 0]), 2, hits)
+
+    assert cache.get(_unit([1, 0.1, 0, 0]), 2) == hits
+    assert cache.get(_unit([0, 1, 0, 0]), 2) is None
+
+
+def test_smaller_k_is_served_from_larger_cached_k():
+    cache = SemanticCache(4)
+    cache.put(_unit([1, 0, 0, 0]), 3, [(1, 0.9), (2, 0.8), (3, 0.7)])
+
+    assert cache.get(_unit([1, 0, 0, 0]), 2) == [(1, 0.9), (2, 0.8)]
+    assert cache.get(_unit([1, 0, 0, 0]), 5) is None
+
+
+def test_put_merges_into_nearest_cluster():
+    cache = SemanticCache(4, threshold=0.9)
+    cache.put(_unit([1, 0, 0, 0]), 2, [(1, 0.9)])
+    cache.put(_unit([1, 0.1, 0, 0]), 2, [(2, 0.9)])
+
+    assert len(cache.entries) == 1
+    (centroid, count, _, _, _), = cache.entries.values()
+    assert count == 2
+    assert np.linalg.norm(centroid) == pytest.approx(1.0)
+
+
+def test_cache_hits_do_not_weigh_the_centroid():
+    cache = SemanticCache(4, threshold=0.5)
+    cache.put(_unit([1, 0, 0, 0]), 1, [(1, 1.0)])
+    for _ in range(50):
+        assert cache.get(_unit([1, 0, 0, 0]), 1) == [(1, 1.0)]
+    cache.put(_unit([1, 1, 0, 0]), 1, [(2, 1.0)])
+
+    (centroid, count, _, _, visits), = cache.entries.values()
+    assert count == 2
+    assert visits == 52
+    # Mean of the two member queries, not 51 copies of the first one
+    np.testing.assert_allclose(centroid, _unit(_unit([1, 0, 0, 0])[0] + _unit([1, 1, 0, 0])[0])[0], rtol=1e-5)
+
+
+def test_eviction_drops_least_visited_cluster():
+    cache = SemanticCache(4, threshold=0.99, max_entries=2)
+    cache.put(_unit([1, 0, 0, 0]), 1, [(1, 1.0)])
+    cache.put(_unit([0, 1, 0, 0]), 1, [(2, 1.0)])
+    cache.get(_unit([1, 0, 0, 0]), 1)
+    cache.put(_unit([0, 0, 1, 0]), 1, [(3, 1.0)])
+
+    assert len(cache.entries) == 2
+    assert cache.index.ntotal == 2
+    assert cache.get(_unit([1, 0, 0, 0]), 1) == [(1, 1.0)]
+    assert cache.get(_unit([0, 1, 0, 0]), 1) is None
+    assert cache.get(_unit([0, 0, 1, 0]), 1) == [(3, 1.0)]
+
+
+def test_clear_empties_the_cache():
+    cache = SemanticCache(4)
+    cache.put(_unit([1, 0, 0, 0]), 1, [(1, 1.0)])
+    cache.clear()
+    assert cache.entries == {}
+    assert cache.get(_unit([1, 0, 0, 0]), 1) is None
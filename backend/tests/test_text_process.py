@@ -0,0 +1,91 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from backend.src.utils.text_process import (
+    chunk_text,
+    dedupe_chunks,
+    iter_chunks,
+    iter_unique_chunks,
+    minhash_signature,
+)
+
+
+def _random_pages(rng, count, max_len):
+    return ["".join(rng.choice("ab \n") for _ in range(rng.randint(0, max_len))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(1, 0), (5, 2), (10, 9), (1000, 200)])
+def test_iter_chunks_matches_chunk_text_over_joined_pages(chunk_size, overlap):
+    rng = random.Random(chunk_size * 31 + overlap)
+    for _ in range(200):
+        pages = _random_pages(rng, rng.randint(0, 8), 3 * chunk_size)
+        assert list(iter_chunks(pages, chunk_size, overlap)) == chunk_text("\n".join(pages), chunk_size, overlap)
+
+
+def test_iter_chunks_handles_page_exactly_one_window_long():
+    pages = ["x" * 10, "y" * 10]
+    assert list(iter_chunks(pages, 10, 3)) == chunk_text("\n".join(pages), 10, 3)
+
+
+def test_iter_chunks_of_nothing_is_empty():
+    assert list(iter_chunks([])) == []
+    assert chunk_text("") == []
+
+
+def _best_chunking_time(length, repeat=5):
+    text = "z" * length
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = sum(1 for _ in iter_chunks([text]))
+        assert count == len(chunk_text(text))
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def test_chunking_is_linear_in_text_length():
+    # A per-window copy of the remaining buffer is quadratic: 8x the text took ~64x as long.
+    # Linear chunking stays near 8x; the bound leaves room for timer and cache noise
+    small, large = _best_chunking_time(1_000_000), _best_chunking_time(8_000_000)
+    assert large / small < 24
+
+
+@pytest.mark.parametrize("overlap", [10, 11])
+def test_overlap_must_be_smaller_than_chunk_size(overlap):
+    with pytest.raises(ValueError):
+        chunk_text("abc", 10, overlap)
+    with pytest.raises(ValueError):
+        list(iter_chunks(["abc"], 10, overlap))
+
+
+def test_minhash_signature_is_deterministic():
+    signature = minhash_signature("the quick brown fox jumps over the lazy dog")
+    assert signature.dtype == np.uint64
+    assert signature.shape == (64,)
+    assert np.array_equal(signature, minhash_signature("The quick brown fox jumps over the lazy dog"))
+
+
+def test_iter_unique_chunks_drops_near_duplicates_and_keeps_positions():
+    base = " ".join(f"word{i}" for i in range(200))
+    chunks = [
+        base,
+        " ".join(f"other{i}" for i in range(200)),
+        base + " word200",
+        " ".join(f"third{i}" for i in range(200)),
+    ]
+    kept = list(iter_unique_chunks(chunks))
+
+    assert [position for position, _, _ in kept] == [0, 1, 3]
+    assert [chunk for _, chunk, _ in kept] == [chunks[0], chunks[1], chunks[3]]
+    for _, chunk, signature in kept:
+        assert np.array_equal(signature, minhash_signature(chunk))
+
+
+def test_dedupe_chunks_returns_kept_chunks_and_signatures():
+    chunks = ["alpha beta gamma delta", "alpha beta gamma delta", "one two three four"]
+    kept, signatures = dedupe_chunks(chunks)
+    assert kept == [chunks[0], chunks[2]]
+    assert len(signatures) == 2
@@ -0,0 +1,217 @@
+import asyncio
+import importlib
+import os
+import sys
+import types
+import zlib
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+DIMENSION = 8
+
+
+def _encode(texts, batch_size=64):
+    # Deterministic unit vectors per text, standing in for the SentenceTransformer model
+    rows = [np.random.default_rng(zlib.crc32(text.encode())).standard_normal(DIMENSION) for text in texts]
+    embeddings = np.asarray(rows, dtype=np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def vector_service(monkeypatch):
+    encoder = types.ModuleType("backend.src.services.embedding_service")
+    encoder.embedding_service = types.SimpleNamespace(get_embeddings=_encode)
+    monkeypatch.setitem(sys.modules, encoder.__name__, encoder)
+    monkeypatch.delitem(sys.modules, "backend.src.services.vector_service", raising=False)
+    module = importlib.import_module("backend.src.services.vector_service")
+    monkeypatch.setattr(module.settings, "VECTOR_TRAIN_SIZE", 10_000)
+    yield module
+    sys.modules.pop("backend.src.services.vector_service", None)
+
+
+@pytest.fixture
+def make_store(vector_service, tmp_path):
+    def make(checkpoint_every=2, compact_ratio=1.0):
+        store = vector_service.VectorStore(dimension=DIMENSION, index_path=str(tmp_path))
+        store.checkpoint_every = checkpoint_every
+        store.compact_ratio = compact_ratio
+        return store
+    return make
+
+
+def _add_batch(store, start, count=10):
+    ids = list(range(start, start + count))
+    store.add_chunks([f"text {i}" for i in ids], ids)
+    return ids
+
+
+def test_unknown_index_type_is_rejected(vector_service, monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_service.settings, "VECTOR_INDEX_TYPE", "ivf_pq")
+    with pytest.raises(ValueError, match="VECTOR_INDEX_TYPE"):
+        vector_service.VectorStore(dimension=DIMENSION, index_path=str(tmp_path))
+
+
+@pytest.mark.parametrize("name", ["faiss_index.bin", "chunk_metadata.pkl"])
+def test_legacy_index_files_fail_loudly(vector_service, tmp_path, name):
+    (tmp_path / name).write_bytes(b"")
+    with pytest.raises(RuntimeError, match=name):
+        vector_service.VectorStore(dimension=DIMENSION, index_path=str(tmp_path))
+
+
+def test_reload_replays_rows_appended_after_checkpoint(make_store):
+    store = make_store()
+    for batch in range(3):
+        _add_batch(store, batch * 10)
+    assert store.adds_since_checkpoint == 1
+    expected = store.search("text 25", threshold=-1, k=3)
+
+    reloaded = make_store()
+    assert reloaded.index.ntotal == 30
+    assert reloaded.search("text 25", threshold=-1, k=3) == expected
+    assert expected[0][0] == 25
+
+
+def test_checkpoint_not_matching_store_prefix_is_ignored(make_store):
+    store = make_store(checkpoint_every=1)
+    _add_batch(store, 0)
+    vectors, ids = store._read_store()
+    keep = ids != 3
+    # Store rewritten without refreshing the snapshot, as after a crash mid-compaction
+    kept_vectors, kept_ids = np.array(vectors[keep]), np.array(ids[keep])
+    del vectors, ids
+    kept_vectors.tofile(store.vectors_file)
+    kept_ids.tofile(store.ids_file)
+
+    reloaded = make_store()
+    assert reloaded.index.ntotal == 9
+    assert 3 not in [chunk_pk for chunk_pk, _ in reloaded.search("text 3", threshold=-1, k=10)]
+
+
+def test_delete_masks_ids_without_rewriting_the_store(make_store):
+    store = make_store()
+    _add_batch(store, 0)
+    store_size = os.path.getsize(store.vectors_file)
+    assert store.search("text 4", threshold=-1, k=1)[0][0] == 4
+
+    store.delete_chunks([4, 5])
+    hits = [chunk_pk for chunk_pk, _ in store.search("text 4", threshold=-1, k=10)]
+    assert len(hits) == 8
+    assert 4 not in hits and 5 not in hits
+    assert os.path.getsize(store.vectors_file) == store_size
+
+
+def test_delete_survives_reload(make_store):
+    store = make_store()
+    _add_batch(store, 0)
+    store.delete_chunks([4, 5])
+    store.delete_chunks([5])
+
+    reloaded = make_store()
+    hits = [chunk_pk for chunk_pk, _ in reloaded.search("text 4", threshold=-1, k=10)]
+    assert reloaded.tombstones == {4, 5}
+    assert len(hits) == 8
+    assert 4 not in hits and 5 not in hits
+
+
+@pytest.mark.parametrize("index_type", ["hnsw_sq8", "ivf", "pq", "sq8"])
+def test_trained_indexes_mask_deleted_ids(vector_service, make_store, monkeypatch, index_type):
+    monkeypatch.setattr(vector_service.settings, "VECTOR_INDEX_TYPE", index_type)
+    monkeypatch.setattr(vector_service.settings, "VECTOR_TRAIN_SIZE", 256)
+    monkeypatch.setattr(vector_service.settings, "VECTOR_PQ_M", 4)
+    monkeypatch.setattr(vector_service.settings, "VECTOR_IVF_NPROBE", 16)
+    store = make_store()
+    _add_batch(store, 0, count=300)
+    assert store.trained
+
+    store.delete_chunks(list(range(0, 300, 2)))
+    hits = store.search("text 7", threshold=-1, k=5)
+    assert len(hits) == 5
+    assert all(chunk_pk % 2 for chunk_pk, _ in hits)
+
+
+def test_compaction_drops_deleted_rows_past_the_ratio(make_store):
+    store = make_store(compact_ratio=0.3)
+    _add_batch(store, 0)
+    store.delete_chunks([1, 2])
+    assert store.index.ntotal == 10
+
+    store.delete_chunks([3])
+    assert store.tombstones == set()
+    assert store.index.ntotal == 7
+    assert sorted(store._read_store()[1]) == [0, 4, 5, 6, 7, 8, 9]
+
+    reloaded = make_store()
+    assert reloaded.tombstones == set()
+    assert reloaded.index.ntotal == 7
+
+
+def test_background_compaction_keeps_rows_changed_while_it_runs(make_store):
+    store = make_store(compact_ratio=0.5)
+    _add_batch(store, 0)
+
+    async def main():
+        store.delete_chunks(list(range(5)))
+        assert store._compaction is not None
+        _add_batch(store, 10)
+        store.delete_chunks([12])
+        await store.wait_for_compaction()
+
+    asyncio.run(main())
+    live = [5, 6, 7, 8, 9, 10, 11] + list(range(13, 20))
+    assert store.tombstones == {12}
+    assert sorted(store._read_store()[1]) == sorted(live + [12])
+    hits = [chunk_pk for chunk_pk, _ in store.search("text 12", threshold=-1, k=20)]
+    assert sorted(hits) == live
+
+    reloaded = make_store()
+    assert reloaded.tombstones == {12}
+    assert reloaded.index.ntotal == 15
+
+
+def test_interrupted_compaction_swap_is_finished_on_load(make_store):
+    store = make_store(checkpoint_every=1)
+    _add_batch(store, 0)
+    store.tombstones = {0, 1}
+    count = len(store._read_store()[1])
+    store._build_compacted(count, frozenset(store.tombstones))
+    # Crash after the vectors rename but before the ids rename
+    os.replace(store.vectors_file + ".compact", store.vectors_file)
+
+    reloaded = make_store()
+    assert sorted(reloaded._read_store()[1]) == list(range(2, 10))
+    assert reloaded.search("text 5", threshold=-1, k=1)[0][0] == 5
+
+
+def test_batch_search_matches_single_searches(make_store):
+    store = make_store()
+    _add_batch(store, 0, count=40)
+    queries = ["text 3", "text 17", "text 3", "unrelated"]
+
+    batched = store.batch_search(queries, threshold=-1, k=3)
+    store.query_cache.clear()
+    assert batched == [store.search(query, threshold=-1, k=3) for query in queries]
+    assert store.batch_search([]) == []
+
+
+def test_float64_embeddings_are_stored_as_float32(make_store):
+    store = make_store()
+    embeddings = _encode(["a", "b"]).astype(np.float64)
+    store.add_embeddings(embeddings, [1, 2])
+
+    vectors, ids = store._read_store()
+    assert list(ids) == [1, 2]
+    np.testing.assert_allclose(vectors, embeddings.astype(np.float32))
+
+
+def test_streamed_batches_count_as_one_add(make_store):
+    store = make_store(checkpoint_every=2)
+    ids = list(range(30))
+    store.add_embedding_batches(
+        (_encode([f"text {i}" for i in batch]), batch) for batch in (ids[:10], ids[10:20], ids[20:])
+    )
+    assert store.adds_since_checkpoint == 1
+    assert list(store._read_store()[1]) == ids
+    assert store.search("text 25", threshold=-1, k=1)[0][0] == 25